@@ -0,0 +1,28 @@
+"""
+Gunicorn settings, picked up automatically from the project root.
+Database pool sizing in settings.py is per worker, so keep
+DB_POOL_MAX_SIZE >= GUNICORN_THREADS.
+The app is loaded once in the master and forked, so workers start warm
+and share its memory; set API_ONLY=1 on API nodes to load less of it.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+wsgi_app = 'online_poll_system.wsgi:application'
+preload_app = True
+
+
+def when_ready(server):
+    # Import every view, serializer and route before forking instead of
+    # on each worker's first request
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+
+def post_fork(server, worker):
+    # Never share a database connection opened in the master with a worker
+    from django.db import connections
+    connections.close_all()
@@ -0,0 +1,102 @@
+"""
+Read-replica routing.
+
+Safe-method requests (GET/HEAD/OPTIONS) read from one of the configured
+replicas; everything else, and every write, goes to `default`.
+After a client writes, its reads stay on the primary for
+`DB_REPLICA_PIN_SECONDS` so it always sees its own vote. The pin lives in
+the default cache, which must be shared by every worker for it to hold;
+`check_replica_pin_cache` fails `manage.py check` otherwise.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Error
+from django.core.exceptions import MiddlewareNotUsed
+
+# Whether queries in the current request may go to a replica
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY = 'db:pin-primary:{}'
+
+# Cache backends whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def check_replica_pin_cache(app_configs=None, **kwargs):
+    """
+    System check: with replicas configured, read-your-writes pins must be
+    stored in a cache every worker can see, or a client's next read may
+    land on another worker that never saw the pin.
+    """
+    if settings.DATABASE_REPLICAS and settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES:
+        return [Error(
+            "DB_REPLICA_HOSTS is set but the default cache is local to each process, "
+            "so reads after a write can be served by a stale replica.",
+            hint="Point CACHE_URL at a shared cache, e.g. redis://host:6379/0.",
+            id='online_poll_system.E001',
+        )]
+    return []
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to a random replica when the current request allows it,
+    and all writes and migrations to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any of them can be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decides per request whether reads may use a replica.
+    Clients are identified by their Authorization header (or session / IP),
+    so pinning works for JWT clients that don't keep cookies.
+    """
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin_key = PIN_KEY.format(self.client_key(request))
+        safe = request.method in SAFE_METHODS
+        token = _read_from_replica.set(safe and not cache.get(pin_key))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
+
+        if not safe:
+            # Read-your-writes: keep this client on the primary until replicas catch up
+            cache.set(pin_key, 1, settings.DB_REPLICA_PIN_SECONDS)
+        return response
+
+    def client_key(self, request):
+        # Guests behind one NAT share an address, so their token tells them apart
+        identity = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.META.get('HTTP_X_GUEST_TOKEN')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            or request.META.get('REMOTE_ADDR', '')
+        )
+        return hashlib.sha1(identity.encode()).hexdigest()
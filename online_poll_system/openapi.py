@@ -0,0 +1,87 @@
+"""
+Precomputed OpenAPI schema.
+
+Introspecting every viewset and serializer is far too slow to repeat on
+each docs hit, so the schema is generated once: at deploy time by
+`manage.py generate_openapi_schema`, which writes `OPENAPI_SCHEMA_FILE`,
+or else on the first request, and then kept for the life of the process.
+It is served as a static JSON document with a content-hash ETag.
+The Swagger UI page is a shell that fetches it from there.
+"""
+import hashlib
+from functools import lru_cache
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import etag, require_safe
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+API_INFO = openapi.Info(
+    title="Online Poll System API",
+    default_version='v1',
+)
+API_PREFIX = '/api/'
+
+
+def generate_schema():
+    """
+    Introspects the API and returns the OpenAPI document as JSON bytes.
+    Views are inspected as an anonymous client would see them. The document
+    carries no host: clients resolve paths against the host (and scheme)
+    that served it. The generator is given a placeholder `url` so it never
+    reads the synthetic request's host, which `ALLOWED_HOSTS` would reject.
+    """
+    request = APIView().initialize_request(APIRequestFactory().get(API_PREFIX))
+    request.user = AnonymousUser()
+    generator = OpenAPISchemaGenerator(API_INFO, url='http://localhost')
+    schema = generator.get_schema(request=request, public=True)
+    for key in ('host', 'schemes'):
+        schema.pop(key, None)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+@lru_cache(maxsize=None)
+def schema_document():
+    """
+    Returns the schema bytes and their ETag, read from `OPENAPI_SCHEMA_FILE`
+    when it was generated at deploy time, otherwise generated now.
+    Memoized per process.
+    """
+    try:
+        content = settings.OPENAPI_SCHEMA_FILE.read_bytes()
+    except FileNotFoundError:
+        content = generate_schema()
+    return content, '"%s"' % hashlib.sha256(content).hexdigest()
+
+
+@require_safe
+@etag(lambda request: schema_document()[1])
+def openapi_schema(request):
+    content, _ = schema_document()
+    response = HttpResponse(content, content_type='application/json')
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
+    return response
+
+
+class DocsPageGenerator(OpenAPISchemaGenerator):
+    """
+    The docs page only needs the API title and version; Swagger UI loads
+    the schema itself from `SWAGGER_SETTINGS['SPEC_URL']`.
+    """
+    def get_schema(self, request=None, public=False):
+        return openapi.Swagger(info=self.info, _prefix='/', paths=openapi.Paths(paths={}))
+
+
+docs_view = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+    generator_class=DocsPageGenerator,
+).with_ui('swagger', cache_timeout=0)
@@ -15,14 +15,13 @@ import environ
 from pathlib import Path
 from datetime import timedelta
 from corsheaders.defaults import default_headers
-# Initialize environment
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Initialize environment
 env = environ.Env()
 environ.Env.read_env(env_file=BASE_DIR / ".env")  # This loads the .env file
 
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -37,6 +36,8 @@ ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=[])
 
 CORS_ALLOW_HEADERS = list(default_headers) + [
     "authorization",  # needed if your API requires JWT or Bearer tokens
+    "idempotency-key",  # safe retries of vote submissions
+    "x-guest-token",  # guest voting without an account
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -45,6 +46,13 @@ CORS_ALLOW_ALL_ORIGINS = True
 # ]
 
 
+# API-only profile: leaves out the admin, Swagger docs, browsable API and
+# static file serving, so web workers boot faster. Run those from a
+# separate deployment (or locally) with API_ONLY unset.
+API_ONLY = env.bool('API_ONLY', default=False)
+# Allowed import time when a worker boots (`manage.py check_import_time`)
+IMPORT_TIME_BUDGET_MS = env.int('IMPORT_TIME_BUDGET_MS', default=600)
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -54,6 +62,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # custom apps
     'rest_framework',
     'rest_framework_simplejwt',
@@ -62,6 +71,11 @@ INSTALLED_APPS = [
     'drf_yasg',
     'corsheaders',
 ]
+if API_ONLY:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in ('django.contrib.admin', 'django.contrib.messages', 'drf_yasg')
+    ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
@@ -71,9 +85,15 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'online_poll_system.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if API_ONLY:
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE
+        if middleware not in ('whitenoise.middleware.WhiteNoiseMiddleware', 'django.contrib.messages.middleware.MessageMiddleware')
+    ]
 
 ROOT_URLCONF = 'online_poll_system.urls'
 
@@ -86,7 +106,7 @@ TEMPLATES = [
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
+                *([] if API_ONLY else ['django.contrib.messages.context_processors.messages']),
             ],
         },
     },
@@ -109,6 +129,73 @@ DATABASES = {
     }
 }
 
+# Connection reuse, per worker process:
+# - "persistent" (default): keep each connection open for DB_CONN_MAX_AGE seconds,
+#   health-checked before reuse
+# - "pool": psycopg's connection pool, sized per worker (DB_POOL_MAX_SIZE should
+#   cover GUNICORN_THREADS); total connections = workers x pool size
+# - "none": a new connection per request (Django's default)
+DB_CONN_MODE = env('DB_CONN_MODE', default='persistent')
+
+if DB_CONN_MODE == 'pool':
+    # Django checks pooled connections on checkout (psycopg_pool's check_connection)
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # the pool owns connection lifetime
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': env.int('DB_POOL_MIN_SIZE', default=1),
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=env.int('GUNICORN_THREADS', default=1) + 1),
+            'max_lifetime': env.float('DB_POOL_MAX_LIFETIME', default=1800.0),
+            'timeout': env.float('DB_POOL_TIMEOUT', default=10.0),
+        },
+    }
+elif DB_CONN_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = env.int('DB_CONN_MAX_AGE', default=60)
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replicas: comma-separated host[:port] list, same credentials as the primary.
+# Safe-method requests read from them (see online_poll_system/db_router.py).
+DATABASE_REPLICAS = []
+for index, replica in enumerate(env.list('DB_REPLICA_HOSTS', default=[])):
+    host, _, port = replica.partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['online_poll_system.db_router.PrimaryReplicaRouter']
+# Seconds a client's reads stay on the primary after it writes
+DB_REPLICA_PIN_SECONDS = env.int('DB_REPLICA_PIN_SECONDS', default=5)
+
+
+# Cache
+# Shared cache for permission metadata, throttles and idempotency keys.
+# Point CACHE_URL at Redis in production (e.g. redis://host:6379/0) so every worker shares it.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Seconds a signed guest voter token stays valid
+GUEST_TOKEN_MAX_AGE = env.int('GUEST_TOKEN_MAX_AGE', default=60 * 60 * 24 * 30)
+
+# Rows accepted by the user import endpoint, whose passwords are hashed
+# inside the request; larger files go through `manage.py import_users`
+USER_IMPORT_MAX_ROWS = env.int('USER_IMPORT_MAX_ROWS', default=50)
+
+# Seconds a stored response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=86400)
+
+# Per-process LRU in front of the shared cache for poll visibility checks
+POLL_VISIBILITY_CACHE = {
+    'MAX_ENTRIES': env.int('POLL_VISIBILITY_CACHE_SIZE', default=2048),
+    'TTL': env.int('POLL_VISIBILITY_CACHE_TTL', default=30),  # seconds
+    'SHARED_TTL': env.int('POLL_VISIBILITY_SHARED_TTL', default=300),  # seconds, shared cache tier
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -173,6 +260,24 @@ REST_FRAMEWORK = {
         # Optionally, you can include TokenAuthentication or JWTAuthentication if needed
         # 'rest_framework.authentication.TokenAuthentication',
     ],
+    # Per-action rates for polls.throttles, keyed "<action>.<user|ip|poll>"
+    'DEFAULT_THROTTLE_RATES': {
+        'vote.user': env('THROTTLE_VOTE_USER', default='30/min'),
+        'vote.ip': env('THROTTLE_VOTE_IP', default='120/min'),
+        'vote.poll': env('THROTTLE_VOTE_POLL', default='6000/min'),
+        'results.user': env('THROTTLE_RESULTS_USER', default='60/min'),
+        'results.ip': env('THROTTLE_RESULTS_IP', default='240/min'),
+        'results.poll': env('THROTTLE_RESULTS_POLL', default='12000/min'),
+        'batch_results.user': env('THROTTLE_BATCH_RESULTS_USER', default='30/min'),
+        'batch_results.ip': env('THROTTLE_BATCH_RESULTS_IP', default='120/min'),
+        'guest_token.ip': env('THROTTLE_GUEST_TOKEN_IP', default='10/min'),
+    },
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        *([] if API_ONLY else ['rest_framework.renderers.BrowsableAPIRenderer']),
+        # Opt-in compact binary responses (`Accept: application/msgpack`)
+        'polls.renderers.MessagePackRenderer',
+    ],
 }
 
 # settings.py
@@ -203,8 +308,25 @@ SWAGGER_SETTINGS = {
     },
     'USE_SESSION_AUTH': False,  # optional; disables login/logout buttons
     'USE_HTTPS': True,
+    # The docs page loads the precomputed schema instead of generating its own
+    'SPEC_URL': 'openapi-schema',
 }
 
+# Transactional outbox relay (`manage.py relay_outbox`): where vote and
+# poll-close events are published: file, queue, celery or a dotted sink class
+OUTBOX_SINK = env('OUTBOX_SINK', default='file')
+OUTBOX_FILE = env('OUTBOX_FILE', default=str(BASE_DIR / 'outbox.ndjson'))
+OUTBOX_CELERY_TASK = env('OUTBOX_CELERY_TASK', default='analytics.ingest_events')
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://localhost:6379/0')
+
+# Half-life of a vote's weight on the trending leaderboard (`/api/polls/trending/`)
+TRENDING_HALF_LIFE_MINUTES = env.float('TRENDING_HALF_LIFE_MINUTES', default=60)
+
+# Written at deploy time by `manage.py generate_openapi_schema`; generated
+# on first request (once per process) when missing
+OPENAPI_SCHEMA_FILE = Path(env('OPENAPI_SCHEMA_FILE', default=str(BASE_DIR / 'openapi.json')))
+OPENAPI_SCHEMA_MAX_AGE = env.int('OPENAPI_SCHEMA_MAX_AGE', default=300)
+
 # Trust X-Forwarded-Proto from proxy
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
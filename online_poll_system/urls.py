@@ -14,37 +14,38 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
+from django.utils.module_loading import import_string
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Online Poll System API",
-      default_version='v1',
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
-
-def schema_with_https(request, *args, **kwargs):
-    request.scheme = 'https'
-    return schema_view.with_ui('swagger', cache_timeout=0)(request, *args, **kwargs)
 # from chats.auth import CustomTokenObtainPairView
 
+def lazy_view(dotted_path):
+    # Imports the view (and everything behind it) on its first request
+    # instead of when the URLconf loads, keeping rarely hit pages off the boot path
+    def view(request, *args, **kwargs):
+        return import_string(dotted_path)(request, *args, **kwargs)
+    return view
+
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('polls.urls')),
     path('api/user/', include('user.urls')),
-    path('api-auth/', include('rest_framework.urls')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     # path('api/custom-token/', CustomTokenObtainPairView.as_view(),
     #      name='custom_token_obtain_pair'),
 ]
+
+# Left out of the API-only profile (see settings.API_ONLY)
+if not settings.API_ONLY:
+    from django.contrib import admin
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+        path('api-auth/', include('rest_framework.urls')),
+        path('api/docs/', lazy_view('online_poll_system.openapi.docs_view'), name='schema-swagger-ui'),
+        path('api/docs/openapi.json', lazy_view('online_poll_system.openapi.openapi_schema'), name='openapi-schema'),
+    ]
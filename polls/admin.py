@@ -1,7 +1,197 @@
 from django.contrib import admin
-from .models import Polls, Questions, Options, Votes
+from django.contrib.postgres.search import SearchQuery
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import (
+    Polls, Questions, Options, Votes, RankedBallot, RankedBallotPattern,
+    ArchivedPoll, PollTemplate, OutboxEvent, PollTrend, SEARCH_CONFIG,
+)
 
-admin.site.register(Polls)
-admin.site.register(Questions)
-admin.site.register(Options)
-admin.site.register(Votes)
+# Unfiltered changelists of tables estimated above this many rows show the
+# estimate instead of running COUNT(*)
+EXACT_COUNT_LIMIT = 100_000
+
+
+def estimated_count(model, using='default'):
+    # Row count from the planner's statistics, or None if the table was never analyzed
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for changelists of large tables. An unfiltered changelist
+    takes its row count from `pg_class.reltuples` (kept current by
+    autovacuum) instead of counting the whole table; filtered changelists
+    count normally, through the filters' indexes.
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base for changelists that must stay fast on tables with millions of rows:
+    estimated counts, no second COUNT(*) for the unfiltered total, and raw ID
+    inputs instead of dropdowns listing every related row.
+    Subclasses list their related columns in `list_select_related`.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class PollStatusFilter(admin.SimpleListFilter):
+    # Each choice matches one of the partial indexes on `polls`
+    title = 'status'
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return [('open', 'Open'), ('deleted', 'Deleted'), ('archived', 'Archived')]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'open':
+            return queryset.filter(is_closed=False)
+        if self.value() in ('deleted', 'archived'):
+            return queryset.filter(**{f'{self.value()}_at__isnull': False})
+        return queryset
+
+
+class VoterFilter(admin.SimpleListFilter):
+    # Served by the (user_id, created_at) index or the partial guest index
+    title = 'voter'
+    parameter_name = 'voter'
+
+    def lookups(self, request, model_admin):
+        return [('user', 'Users'), ('guest', 'Guests')]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'user':
+            return queryset.filter(user_id__isnull=False)
+        if self.value() == 'guest':
+            return queryset.filter(guest_id__isnull=False)
+        return queryset
+
+
+class PublishedFilter(admin.SimpleListFilter):
+    # Pending and published events each have a partial index
+    title = 'published'
+    parameter_name = 'published'
+
+    def lookups(self, request, model_admin):
+        return [('no', 'Pending'), ('yes', 'Published')]
+
+    def queryset(self, request, queryset):
+        if self.value() in ('yes', 'no'):
+            return queryset.filter(published_at__isnull=self.value() == 'no')
+        return queryset
+
+
+@admin.register(Polls)
+class PollsAdmin(LargeTableAdmin):
+    list_display = ('title', 'created_by', 'is_public', 'is_closed', 'created_at', 'expires_at')
+    list_select_related = ('created_by',)
+    list_filter = (PollStatusFilter,)
+    raw_id_fields = ('created_by',)
+    readonly_fields = ('search_vector',)
+    # The search box matches the full-text document (see `get_search_results`)
+    search_fields = ('title',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # GIN-indexed full-text match instead of ILIKE scans
+        if not search_term:
+            return queryset, False
+        query = SearchQuery(search_term, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query), False
+
+
+@admin.register(Questions)
+class QuestionsAdmin(LargeTableAdmin):
+    list_display = ('question_text', 'poll_id', 'question_type', 'created_at')
+    list_select_related = ('poll_id__created_by',)
+    raw_id_fields = ('poll_id',)
+
+
+@admin.register(Options)
+class OptionsAdmin(LargeTableAdmin):
+    list_display = ('option_text', 'question_id', 'created_at')
+    list_select_related = ('question_id',)
+    raw_id_fields = ('question_id',)
+
+    def has_delete_permission(self, request, obj=None):
+        # Ranked ballots refer to options by position (see `Questions.options_locked`)
+        if obj is not None and obj.question_id.options_locked():
+            return False
+        return super().has_delete_permission(request, obj)
+
+
+@admin.register(Votes)
+class VotesAdmin(LargeTableAdmin):
+    # Explicit columns: `Votes.__str__` would load the voter and option per row
+    list_display = ('vote_id', 'option_id', 'user_id', 'guest_id', 'created_at')
+    list_select_related = ('option_id', 'user_id')
+    list_filter = (VoterFilter,)
+    raw_id_fields = ('option_id', 'user_id')
+
+
+@admin.register(RankedBallot)
+class RankedBallotAdmin(LargeTableAdmin):
+    list_display = ('ballot_id', 'question_id', 'user_id', 'guest_id', 'ranking', 'created_at')
+    list_select_related = ('question_id', 'user_id')
+    list_filter = (VoterFilter,)
+    raw_id_fields = ('question_id', 'user_id')
+
+
+@admin.register(RankedBallotPattern)
+class RankedBallotPatternAdmin(LargeTableAdmin):
+    list_display = ('question_id', 'ranking', 'ballot_count')
+    list_select_related = ('question_id',)
+    raw_id_fields = ('question_id',)
+
+
+@admin.register(ArchivedPoll)
+class ArchivedPollAdmin(LargeTableAdmin):
+    list_display = ('title', 'created_by', 'archived_at')
+    list_select_related = ('created_by',)
+    raw_id_fields = ('created_by',)
+
+
+@admin.register(PollTemplate)
+class PollTemplateAdmin(LargeTableAdmin):
+    list_display = ('name', 'created_by', 'created_at')
+    list_select_related = ('created_by',)
+    raw_id_fields = ('created_by',)
+
+
+@admin.register(PollTrend)
+class PollTrendAdmin(LargeTableAdmin):
+    list_display = ('poll_id', 'score', 'updated_at')
+    list_select_related = ('poll_id__created_by',)
+    raw_id_fields = ('poll_id',)
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(LargeTableAdmin):
+    """
+    Read-only: events are written with their changes and published by the relay.
+    """
+    list_display = ('id', 'event_type', 'poll_id', 'created_at', 'published_at')
+    list_filter = (PublishedFilter,)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        # Published events are removed by `relay_outbox --prune-days`, pending ones never
+        return False
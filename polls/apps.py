@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class PollsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'polls'
+
+    def ready(self):
+        # Connects model signal receivers
+        from . import receivers  # noqa: F401
+        # The project package is not an app, so its checks are registered here
+        from django.core.checks import Tags, register
+        from online_poll_system.db_router import check_replica_pin_cache
+        register(check_replica_pin_cache, Tags.caches)
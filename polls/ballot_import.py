@@ -0,0 +1,367 @@
+"""
+Bulk import of ballots collected offline (paper or kiosk voting).
+
+Rows are validated in streaming chunks: the questions, options and users a
+chunk refers to are looked up with one query each (questions and options
+are then cached for the rest of the file). Valid rows are streamed with
+`COPY` into a temporary staging table, and once the whole file is staged
+they are merged into `votes` and `ranked_ballots` with set-based SQL:
+
+- Duplicates are dropped both within the file (first row wins) and against
+  the votes already recorded, with the same rules as the vote endpoint:
+  one vote per voter on a single-choice question, one vote per voter and
+  option on a multiple-choice question, one ballot per voter on a ranked one
+- Single-choice questions are locked against concurrent votes from the API
+  for the merge, which the unique constraints alone don't cover
+- Ranked ballot patterns, the stored tallies of ranked questions, are
+  updated once from the merged ballots
+- Every merged vote and ballot gets its outbox event, as from the API
+- Trending scores of the polls concerned are updated once, with every
+  merged vote weighted by its `created_at` (see `polls.trending`)
+
+The import is one transaction: it applies completely or not at all.
+"""
+import csv
+import json
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+from django.db import connection, transaction
+from django.utils import timezone
+from user.models import User
+from .models import Options, Questions, OutboxEvent
+from .trending import EPOCH, MAX_LOG_GAP, decay_rate
+
+MAX_REPORTED_ERRORS = 100
+
+STAGING_TABLE = """
+    CREATE TEMPORARY TABLE ballot_import (
+        row_id uuid PRIMARY KEY,
+        line integer NOT NULL,
+        poll_id uuid NOT NULL,
+        question_id uuid NOT NULL,
+        question_type varchar(10) NOT NULL,
+        option_id uuid,
+        ranking smallint[],
+        ranking_ids uuid[],
+        user_id uuid,
+        guest_id uuid,
+        created_at timestamptz NOT NULL
+    ) ON COMMIT DROP
+"""
+STAGING_COLUMNS = (
+    'row_id', 'line', 'poll_id', 'question_id', 'question_type', 'option_id',
+    'ranking', 'ranking_ids', 'user_id', 'guest_id', 'created_at',
+)
+
+# Exclusive counterpart of the shared lock `lock_voter` takes on a question,
+# so no vote from the API lands between the merge's duplicate check and its
+# insert. One lock per single-choice question rather than per voter, which an
+# import of many voters would run out of; taken in a fixed order.
+LOCK_QUESTIONS = """
+    SELECT pg_advisory_xact_lock(hashtextextended(question_id::text, 0))
+    FROM (
+        SELECT DISTINCT question_id FROM ballot_import WHERE question_type = %(single)s ORDER BY question_id
+    ) questions
+"""
+
+# First staged row per voter and question (single choice) or option (multiple
+# choice), unless the voter already has a vote there
+MERGE_VOTES = """
+    WITH candidates AS (
+        SELECT DISTINCT ON (dedup_key, user_id, guest_id) *
+        FROM (
+            SELECT *, CASE WHEN question_type = %(single)s THEN question_id ELSE option_id END AS dedup_key
+            FROM ballot_import
+            WHERE question_type <> %(ranked)s
+        ) staged
+        ORDER BY dedup_key, user_id, guest_id, line
+    ),
+    fresh AS (
+        SELECT * FROM candidates c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM votes v JOIN options o ON o.option_id = v.option_id_id
+            WHERE v.user_id_id = c.user_id
+              AND CASE WHEN c.question_type = %(single)s THEN o.question_id_id = c.question_id
+                       ELSE v.option_id_id = c.option_id END
+        ) AND NOT EXISTS (
+            SELECT 1 FROM votes v JOIN options o ON o.option_id = v.option_id_id
+            WHERE v.guest_id = c.guest_id
+              AND CASE WHEN c.question_type = %(single)s THEN o.question_id_id = c.question_id
+                       ELSE v.option_id_id = c.option_id END
+        )
+    ),
+    inserted AS (
+        INSERT INTO votes (vote_id, option_id_id, user_id_id, guest_id, created_at)
+        SELECT row_id, option_id, user_id, guest_id, created_at FROM fresh
+        ON CONFLICT DO NOTHING
+        RETURNING vote_id
+    )
+    INSERT INTO outbox_events (event_type, poll_id, payload, created_at)
+    SELECT %(event)s, f.poll_id, jsonb_build_object(
+        'vote_id', f.row_id, 'question_id', f.question_id, 'option_id', f.option_id,
+        'user_id', f.user_id, 'guest_id', f.guest_id, 'created_at', f.created_at
+    ), now()
+    FROM inserted i JOIN fresh f ON f.row_id = i.vote_id
+"""
+
+# First staged ballot per voter and question; the partial unique indexes
+# drop voters who already have one
+MERGE_BALLOTS = """
+    WITH candidates AS (
+        SELECT DISTINCT ON (question_id, user_id, guest_id) *
+        FROM ballot_import
+        WHERE question_type = %(ranked)s
+        ORDER BY question_id, user_id, guest_id, line
+    ),
+    inserted AS (
+        INSERT INTO ranked_ballots (ballot_id, question_id_id, user_id_id, guest_id, ranking, created_at)
+        SELECT row_id, question_id, user_id, guest_id, ranking, created_at FROM candidates
+        ON CONFLICT DO NOTHING
+        RETURNING ballot_id, question_id_id, ranking
+    ),
+    patterns AS (
+        INSERT INTO ranked_ballot_patterns (question_id_id, ranking, ballot_count)
+        SELECT question_id_id, ranking, count(*) FROM inserted GROUP BY question_id_id, ranking
+        ON CONFLICT (question_id_id, ranking)
+        DO UPDATE SET ballot_count = ranked_ballot_patterns.ballot_count + EXCLUDED.ballot_count
+    )
+    INSERT INTO outbox_events (event_type, poll_id, payload, created_at)
+    SELECT %(event)s, c.poll_id, jsonb_build_object(
+        'ballot_id', c.row_id, 'question_id', c.question_id, 'ranking', c.ranking_ids,
+        'user_id', c.user_id, 'guest_id', c.guest_id, 'created_at', c.created_at
+    ), now()
+    FROM inserted i JOIN candidates c ON c.row_id = i.ballot_id
+"""
+
+# Log-sum-exp of the merged votes' weights per poll, added to the stored score
+MERGE_TRENDS = """
+    INSERT INTO poll_trends (poll_id_id, score, updated_at)
+    SELECT poll_id, peak + ln(sum(exp(GREATEST(weight - peak, -%(gap)s)))), now()
+    FROM (
+        SELECT poll_id, weight, max(weight) OVER (PARTITION BY poll_id) AS peak
+        FROM (
+            SELECT s.poll_id, %(rate)s * extract(epoch FROM s.created_at - %(epoch)s) AS weight
+            FROM ballot_import s
+            WHERE EXISTS (SELECT 1 FROM votes v WHERE v.vote_id = s.row_id)
+               OR EXISTS (SELECT 1 FROM ranked_ballots b WHERE b.ballot_id = s.row_id)
+        ) merged
+    ) weighted
+    GROUP BY poll_id, peak
+    ON CONFLICT (poll_id_id) DO UPDATE SET
+        score = GREATEST(poll_trends.score, EXCLUDED.score)
+            + ln(1 + exp(-LEAST(abs(poll_trends.score - EXCLUDED.score), %(gap)s))),
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def read_ballot_rows(stream, fmt):
+    """
+    Lazily yields `(line_number, row)` pairs from a CSV (with a header row)
+    or NDJSON text stream. In CSV files, `ranking` lists option IDs
+    separated by spaces.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if row.get('ranking'):
+                row['ranking'] = row['ranking'].split()
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+def _uuid(value):
+    return uuid.UUID(str(value)) if value else None
+
+
+def _parse_row(row, now):
+    """
+    Checks a row's shape: a question, a voter (`user_id` or `guest_id`),
+    an `option_id` or a `ranking`, and an optional ISO `created_at`.
+    Returns the parsed values, or raises ValueError with the reason.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Row is not a valid JSON object.")
+    try:
+        question_id = _uuid(row.get('question_id'))
+        option_id = _uuid(row.get('option_id'))
+        user_id = _uuid(row.get('user_id'))
+        guest_id = _uuid(row.get('guest_id'))
+        ranking = [uuid.UUID(str(value)) for value in row.get('ranking') or []]
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Malformed ID.")
+    if question_id is None:
+        raise ValueError("Missing question_id.")
+    if (user_id is None) == (guest_id is None):
+        raise ValueError("Give exactly one of user_id or guest_id.")
+    if (option_id is None) == (not ranking):
+        raise ValueError("Give exactly one of option_id or ranking.")
+
+    created_at = now
+    if row.get('created_at'):
+        try:
+            created_at = datetime.fromisoformat(row['created_at'])
+        except (TypeError, ValueError):
+            raise ValueError("Malformed created_at.")
+        if timezone.is_naive(created_at):
+            created_at = created_at.replace(tzinfo=dt_timezone.utc)
+    return question_id, option_id, ranking, user_id, guest_id, created_at
+
+
+class BallotImporter:
+    """
+    Validates ballot rows chunk by chunk and stages them with `COPY`.
+    See the module docstring; use through `import_ballots`.
+    """
+    def __init__(self, allow_closed=False):
+        self.allow_closed = allow_closed
+        self.now = timezone.now()
+        # Question ID -> (poll ID, type, reason it can't take votes or None)
+        self.questions = {}
+        # Question ID -> option IDs in ballot order (see `RankedBallot`)
+        self.options = {}
+        self.summary = {'staged': 0, 'skipped': 0, 'errors': []}
+
+    def reject(self, line_number, message):
+        self.summary['skipped'] += 1
+        if len(self.summary['errors']) < MAX_REPORTED_ERRORS:
+            self.summary['errors'].append({'line': line_number, 'error': message})
+
+    def load_questions(self, question_ids):
+        # One query for the new questions of a chunk, one for their options
+        missing = set(question_ids) - self.questions.keys()
+        if not missing:
+            return
+        for question in Questions.objects.filter(pk__in=missing).values(
+            'question_id', 'question_type', 'poll_id', 'poll_id__is_closed', 'poll_id__expires_at',
+            'poll_id__deleted_at', 'poll_id__archived_at',
+        ):
+            if question['poll_id__deleted_at'] or question['poll_id__archived_at']:
+                state = "The poll was deleted or archived."
+            elif not self.allow_closed and (
+                question['poll_id__is_closed']
+                or (question['poll_id__expires_at'] and question['poll_id__expires_at'] < self.now)
+            ):
+                state = "Voting is closed or expired for this poll (see --allow-closed)."
+            else:
+                state = None
+            self.questions[question['question_id']] = (question['poll_id'], question['question_type'], state)
+        for question_id in missing:
+            self.questions.setdefault(question_id, (None, None, "Question not found."))
+            self.options[question_id] = []
+        for question_id, option_id in Options.objects.filter(question_id__in=missing).order_by('option_id').values_list('question_id', 'option_id'):
+            self.options[question_id].append(option_id)
+
+    def validate(self, chunk):
+        """
+        Returns the staging rows for the valid rows of `chunk`, a list of
+        `(line_number, row)` pairs, and records the others as skipped.
+        """
+        parsed = []
+        for line_number, row in chunk:
+            try:
+                parsed.append((line_number, _parse_row(row, self.now)))
+            except ValueError as exc:
+                self.reject(line_number, str(exc))
+
+        self.load_questions(values[0] for _, values in parsed)
+        user_ids = {values[3] for _, values in parsed if values[3]}
+        known_users = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True)) if user_ids else set()
+
+        staged = []
+        for line_number, (question_id, option_id, ranking, user_id, guest_id, created_at) in parsed:
+            poll_id, question_type, state = self.questions[question_id]
+            options = self.options[question_id]
+            if state:
+                self.reject(line_number, state)
+            elif user_id and user_id not in known_users:
+                self.reject(line_number, "User not found.")
+            elif question_type == Questions.RANKED and option_id:
+                self.reject(line_number, "This question takes a ranked ballot; send `ranking` instead.")
+            elif question_type != Questions.RANKED and ranking:
+                self.reject(line_number, "Only ranked-choice questions take a `ranking`.")
+            elif option_id and option_id not in options:
+                self.reject(line_number, "This option doesn't belong to the question.")
+            elif len(set(ranking)) != len(ranking):
+                self.reject(line_number, "An option can only be ranked once.")
+            elif not set(ranking) <= set(options):
+                self.reject(line_number, "Every ranked option must belong to the question.")
+            else:
+                staged.append((
+                    uuid.uuid4(), line_number, poll_id, question_id, question_type, option_id,
+                    [options.index(option) for option in ranking] or None, ranking or None,
+                    user_id, guest_id, created_at,
+                ))
+        return staged
+
+    def stage(self, rows):
+        # Streams the rows into the staging table in COPY format
+        with connection.cursor() as cursor:
+            with cursor.copy(f"COPY ballot_import ({', '.join(STAGING_COLUMNS)}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+        self.summary['staged'] += len(rows)
+
+    def merge(self):
+        # Returns the number of votes and of ranked ballots merged
+        params = {'single': Questions.SINGLE, 'ranked': Questions.RANKED}
+        with connection.cursor() as cursor:
+            cursor.execute(LOCK_QUESTIONS, params)
+            cursor.execute(MERGE_VOTES, {**params, 'event': OutboxEvent.VOTE_CAST})
+            votes = cursor.rowcount
+            cursor.execute(MERGE_BALLOTS, {**params, 'event': OutboxEvent.BALLOT_CAST})
+            ballots = cursor.rowcount
+            cursor.execute(MERGE_TRENDS, {'rate': decay_rate(), 'epoch': EPOCH, 'gap': MAX_LOG_GAP})
+        return votes, ballots
+
+
+def import_ballots(rows, batch_size=5000, dry_run=False, allow_closed=False):
+    """
+    Imports offline ballots from an iterable of `(line_number, row)` pairs.
+
+    - Each row is one vote (`question_id`, `option_id`) or one ranked ballot
+      (`question_id`, `ranking` as option IDs in preference order), cast by
+      a `user_id` or a `guest_id`, optionally with its `created_at`
+    - Validates and stages `batch_size` rows at a time, so memory stays flat
+    - Rejects rows for unknown, deleted or archived polls, questions and
+      users, options from another question, and closed or expired polls
+      unless `allow_closed`
+    - Merges everything in one transaction (see the module docstring)
+    - With `dry_run`, runs the whole import and rolls it back
+    - Returns a summary: rows staged and skipped, votes and ballots merged,
+      duplicates dropped, and the first errors
+    """
+    importer = BallotImporter(allow_closed=allow_closed)
+    rows = iter(rows)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(STAGING_TABLE)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            staged = importer.validate(chunk)
+            if staged:
+                importer.stage(staged)
+
+        votes, ballots = importer.merge()
+        with connection.cursor() as cursor:
+            # Not left for ON COMMIT: the caller's transaction may run another import
+            cursor.execute("DROP TABLE ballot_import")
+        if dry_run:
+            transaction.set_rollback(True)
+
+    summary = importer.summary
+    summary.update(
+        dry_run=dry_run,
+        votes=votes,
+        ballots=ballots,
+        duplicates=summary['staged'] - votes - ballots,
+    )
+    return summary
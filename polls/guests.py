@@ -0,0 +1,50 @@
+import uuid
+from collections import namedtuple
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+SALT = 'polls.guest-voter'
+
+# Identity of a guest voter, carried as `request.auth` (request.user stays anonymous)
+GuestVoter = namedtuple('GuestVoter', ['guest_id'])
+
+
+def issue_guest_token():
+    """
+    Issues a signed, stateless voter token for guest voting.
+    Nothing is stored: the token itself carries the guest ID.
+    """
+    guest_id = uuid.uuid4()
+    return {
+        'guest_id': str(guest_id),
+        'guest_token': signing.dumps(str(guest_id), salt=SALT),
+    }
+
+
+def read_guest_token(token):
+    # Returns the guest ID from a valid, unexpired token
+    try:
+        return uuid.UUID(signing.loads(token, salt=SALT, max_age=settings.GUEST_TOKEN_MAX_AGE))
+    except (signing.BadSignature, ValueError):
+        raise AuthenticationFailed("Invalid or expired guest token.")
+
+
+def get_guest(request):
+    # The GuestVoter behind this request, or None for everyone else
+    return request.auth if isinstance(request.auth, GuestVoter) else None
+
+
+class GuestTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates guest voters from the `X-Guest-Token` header.
+    Leaves `request.user` anonymous and sets `request.auth` to a `GuestVoter`,
+    so no user row is ever read or written.
+    """
+    def authenticate(self, request):
+        token = request.headers.get('X-Guest-Token')
+        if not token:
+            return None
+        return AnonymousUser(), GuestVoter(read_guest_token(token))
@@ -0,0 +1,99 @@
+import functools
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from .guests import get_guest
+
+RESPONSE_KEY = 'idempotency:response:{}'
+LOCK_KEY = 'idempotency:lock:{}'
+# How long a concurrent duplicate waits for the first request to finish
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _scope(request, key):
+    # Keys are per client and per endpoint, so clients can't collide or replay each other
+    guest = get_guest(request)
+    if guest:
+        owner = f'guest:{guest.guest_id}'
+    elif request.user and request.user.is_authenticated:
+        owner = request.user.pk
+    else:
+        owner = request.META.get('REMOTE_ADDR')
+    return hashlib.sha256(f'{owner}|{request.path}|{key}'.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _replay(stored, fingerprint):
+    if stored['fingerprint'] != fingerprint:
+        return Response(
+            {"detail": "Idempotency-Key was already used with a different request body."},
+            status=422,
+        )
+    return Response(stored['data'], status=stored['status'], headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(view_method):
+    """
+    Makes a viewset action safe to retry with an `Idempotency-Key` header.
+
+    - Requests without the header run normally
+    - The first request with a key runs under a per-key lock and its response
+      is stored for `IDEMPOTENCY_KEY_TTL` seconds
+    - Repeats get the stored response back without running the action again
+    - A concurrent duplicate waits briefly for the first one, then gets 409
+
+    The lock and stored responses are only shared between workers when the
+    default cache is; the vote itself is guarded in the database either way
+    (see `VotesSerializer.create`).
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        scope = _scope(request, key)
+        fingerprint = _fingerprint(request)
+
+        stored = cache.get(RESPONSE_KEY.format(scope))
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        if not cache.add(LOCK_KEY.format(scope), 1, LOCK_WAIT * 2):
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                stored = cache.get(RESPONSE_KEY.format(scope))
+                if stored is not None:
+                    return _replay(stored, fingerprint)
+            return Response(
+                {"detail": "A request with this Idempotency-Key is still in progress."},
+                status=409,
+            )
+
+        try:
+            # The first holder may have finished between our read and the lock
+            stored = cache.get(RESPONSE_KEY.format(scope))
+            if stored is not None:
+                return _replay(stored, fingerprint)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code < 500:
+                cache.set(
+                    RESPONSE_KEY.format(scope),
+                    {'status': response.status_code, 'data': response.data, 'fingerprint': fingerprint},
+                    settings.IDEMPOTENCY_KEY_TTL,
+                )
+            return response
+        finally:
+            cache.delete(LOCK_KEY.format(scope))
+
+    return wrapper
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from polls.services import archive_polls
+
+
+class Command(BaseCommand):
+    """
+    Moves closed polls that have been idle for --days into the archive tables.
+    The hot rows are removed afterwards by `purge_deleted_polls`.
+    """
+    help = "Archive closed polls older than N days."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=180, help="Archive closed polls unchanged for this many days.")
+        parser.add_argument('--batch-size', type=int, default=200, help="Polls archived per transaction.")
+
+    def handle(self, *args, **options):
+        archived = archive_polls(options['days'], batch_size=options['batch_size'])
+        self.stdout.write(f"Archived {archived} poll(s).")
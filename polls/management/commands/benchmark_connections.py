@@ -0,0 +1,81 @@
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.utils import load_backend
+from polls.models import Questions, Options, Votes
+
+
+class Command(BaseCommand):
+    """
+    Times the vote path's queries under each `DB_CONN_MODE`: a new
+    connection per request (`none`), a reused connection (`persistent`) and
+    psycopg's pool (`pool`). Each iteration is one request: it starts and
+    finishes the connection as Django's request signals do, loads the
+    question and option, runs the duplicate-vote check and inserts a guest
+    vote in a transaction that is rolled back, so no votes are kept.
+    Needs at least one question with options in the database.
+    """
+    help = "Benchmark connection setup overhead on the vote path for each DB_CONN_MODE."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Vote requests per mode.")
+
+    def wrapper(self, mode):
+        # A connection configured like the default one would be in `mode`
+        settings_dict = dict(connections['default'].settings_dict)
+        settings_dict['OPTIONS'] = dict(settings_dict['OPTIONS'])
+        settings_dict['OPTIONS'].pop('pool', None)
+        settings_dict['CONN_MAX_AGE'] = 0
+        settings_dict['CONN_HEALTH_CHECKS'] = False
+        if mode == 'persistent':
+            settings_dict['CONN_MAX_AGE'] = 60
+            settings_dict['CONN_HEALTH_CHECKS'] = True
+        elif mode == 'pool':
+            settings_dict['OPTIONS']['pool'] = {'min_size': 1, 'max_size': 2}
+        alias = f'benchmark_{mode}'
+        backend = load_backend(settings_dict['ENGINE'])
+        connections[alias] = backend.DatabaseWrapper(settings_dict, alias)
+        return alias
+
+    def vote(self, alias, question_id, option_id):
+        # The queries `VotesSerializer` runs for a guest vote
+        question = Questions.objects.using(alias).select_related('poll_id').get(pk=question_id)
+        option = Options.objects.using(alias).get(pk=option_id, question_id=question)
+        guest_id = uuid.uuid4()
+        Votes.objects.using(alias).filter(option_id__question_id=question, guest_id=guest_id).exists()
+        with transaction.atomic(using=alias):
+            Votes.objects.using(alias).create(option_id=option, guest_id=guest_id)
+            transaction.set_rollback(True, using=alias)
+
+    def handle(self, *args, **options):
+        option = Options.objects.order_by().values('option_id', 'question_id').first()
+        if option is None:
+            raise CommandError("No question with options to vote on; create a poll first.")
+
+        measured = []
+        for mode in ('none', 'persistent', 'pool'):
+            alias = self.wrapper(mode)
+            connection = connections[alias]
+            timings = []
+            try:
+                for _ in range(options['requests']):
+                    started = time.perf_counter()
+                    connection.close_if_unusable_or_obsolete()  # request_started
+                    self.vote(alias, option['question_id'], option['option_id'])
+                    connection.close_if_unusable_or_obsolete()  # request_finished
+                    timings.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+                if mode == 'pool':
+                    connection.close_pool()
+            timings.sort()
+            measured.append((mode, timings[len(timings) // 2], timings[int(len(timings) * 0.95)]))
+
+        self.stdout.write(f"{options['requests']} vote requests per mode")
+        baseline = measured[0][1]
+        for mode, median, p95 in measured:
+            self.stdout.write(
+                f"{mode:<11} median {median * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  "
+                f"({baseline / median:4.1f}x faster than none)"
+            )
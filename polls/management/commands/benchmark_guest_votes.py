@@ -0,0 +1,70 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from polls.management.local_client import local_client
+from polls.models import Options, Polls, Questions
+from user.models import User
+
+
+class Command(BaseCommand):
+    """
+    Times a first vote from a new voter on a public poll, through the API
+    in this process: a guest token then a guest vote, against registering
+    an account (which hashes a password and writes a user) then voting
+    with its JWT. Each voter comes from its own client address, so the
+    per-IP throttles don't cut the run short. Everything runs in one
+    transaction that is rolled back; no users, polls or votes are kept.
+    """
+    help = "Benchmark guest voting against registering and then voting."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=50, help="New voters per flow.")
+
+    def post(self, path, data, expected=(200, 201), **headers):
+        response = self.client.post(
+            path, data=json.dumps(data), content_type='application/json', secure=True, **headers
+        )
+        if response.status_code not in expected:
+            raise CommandError(f"POST {path} returned {response.status_code}: {response.content[:200]!r}")
+        return response.json()
+
+    def guest_vote(self, index, vote_path, option_id):
+        address = {'REMOTE_ADDR': f'10.1.{index // 250}.{index % 250 + 1}'}
+        token = self.post('/api/polls/guest-token/', {}, **address)['guest_token']
+        self.post(vote_path, {'option_id': option_id}, HTTP_X_GUEST_TOKEN=token, **address)
+
+    def registered_vote(self, index, vote_path, option_id):
+        address = {'REMOTE_ADDR': f'10.2.{index // 250}.{index % 250 + 1}'}
+        username = f'benchmark-voter-{index}'
+        account = self.post('/api/user/register/', {
+            'username': username, 'email': f'{username}@benchmark.invalid', 'password': 'benchmark-password',
+        }, **address)
+        self.post(vote_path, {'option_id': option_id}, HTTP_AUTHORIZATION=f"Bearer {account['access']}", **address)
+
+    def handle(self, *args, **options):
+        self.client = local_client()
+        measured = []
+        with transaction.atomic():
+            owner = User.objects.create_user(
+                username='benchmark-owner', email='benchmark-owner@benchmark.invalid', password='benchmark-password'
+            )
+            poll = Polls.objects.create(title="Guest benchmark", description="", created_by=owner, is_public=True)
+            question = Questions.objects.create(poll_id=poll, question_text="Pick one", question_type=Questions.SINGLE)
+            option = Options.objects.create(question_id=question, option_text="Yes")
+            vote_path = f'/api/polls/{poll.pk}/questions/{question.pk}/vote/'
+
+            for name, flow in (("guest token + vote", self.guest_vote), ("register + vote", self.registered_vote)):
+                timings = []
+                for index in range(options['voters']):
+                    started = time.perf_counter()
+                    flow(index, vote_path, str(option.pk))
+                    timings.append(time.perf_counter() - started)
+                timings.sort()
+                measured.append((name, timings[len(timings) // 2], timings[int(len(timings) * 0.95)]))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{options['voters']} new voters per flow")
+        for name, median, p95 in measured:
+            self.stdout.write(f"{name:<20} median {median * 1000:8.2f} ms  p95 {p95 * 1000:8.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Guest voting is {measured[1][1] / measured[0][1]:,.1f}x faster to a first vote"))
@@ -0,0 +1,57 @@
+import random
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand
+from polls.ranked import instant_runoff
+
+
+class Command(BaseCommand):
+    """
+    Times instant-runoff result computation on synthetic ranked ballots,
+    counting over grouped ballot patterns (what `/results/` does) against
+    counting every ballot individually. Runs in memory; the database is not touched.
+    """
+    help = "Benchmark ranked-choice result computation."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ballots', type=int, default=1_000_000, help="Number of synthetic ballots.")
+        parser.add_argument('--options', type=int, default=5, help="Options on the question.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for repeatable runs.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        candidates = range(options['options'])
+        # Skewed preferences with partial rankings, so several rounds are needed
+        weights = [1 / (index + 1) for index in candidates]
+
+        self.stdout.write(f"Generating {options['ballots']:,} ballots over {options['options']} options...")
+        ballots = []
+        for _ in range(options['ballots']):
+            ranking, pool, pool_weights = [], list(candidates), list(weights)
+            for _ in range(rng.randint(1, len(pool))):
+                index = rng.choices(range(len(pool)), pool_weights)[0]
+                ranking.append(pool.pop(index))
+                pool_weights.pop(index)
+            ballots.append(tuple(ranking))
+
+        started = time.perf_counter()
+        patterns = Counter(ballots)
+        grouping = time.perf_counter() - started
+        self.stdout.write(f"Grouped into {len(patterns):,} distinct patterns in {grouping:.3f}s (paid once, as ballots are cast)")
+
+        started = time.perf_counter()
+        winner, rounds = instant_runoff(patterns.items(), candidates)
+        by_pattern = time.perf_counter() - started
+
+        started = time.perf_counter()
+        naive_winner, naive_rounds = instant_runoff(((ballot, 1) for ballot in ballots), candidates)
+        by_ballot = time.perf_counter() - started
+
+        if (winner, rounds) != (naive_winner, naive_rounds):
+            self.stderr.write(self.style.ERROR("Pattern and per-ballot counts disagree."))
+            return
+
+        self.stdout.write(f"Winner: option {winner} after {len(rounds)} round(s)")
+        self.stdout.write(f"IRV over patterns: {by_pattern * 1000:.2f} ms")
+        self.stdout.write(f"IRV over ballots:  {by_ballot * 1000:.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {by_ballot / by_pattern:,.0f}x"))
@@ -0,0 +1,58 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from polls.models import Polls
+from polls.serializers import PollsSerializer, PollsReadSerializer
+
+
+class Command(BaseCommand):
+    """
+    Times serializing a page of polls with `PollsSerializer` (what list and
+    retrieve used before) against `PollsReadSerializer` over the
+    equivalent `.values()` rows, and checks both render the same bytes.
+    Runs in memory on unsaved instances; the database is not touched, so
+    only serialization cost is measured.
+    """
+    help = "Benchmark the ModelSerializer against the lightweight read serializer for poll listings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=300, help="Polls per page.")
+        parser.add_argument('--repeat', type=int, default=50, help="Serializations per serializer; the median is reported.")
+
+    def time_serialize(self, serialize, repeat):
+        timings, data = [], None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serialize()
+            timings.append(time.perf_counter() - started)
+        return sorted(timings)[len(timings) // 2], data
+
+    def handle(self, *args, **options):
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        owner_id = uuid.uuid4()
+        polls = [
+            Polls(
+                poll_id=uuid.uuid4(), title=f"Poll {index}", description="Benchmark poll",
+                created_by_id=owner_id, created_at=now - timedelta(minutes=index),
+                expires_at=now + timedelta(days=index % 7) if index % 2 else None,
+                is_closed=False, is_public=True,
+            )
+            for index in range(options['rows'])
+        ]
+        reader = PollsReadSerializer()
+        rows = [reader.row_from_instance(poll) for poll in polls]
+
+        model_time, model_data = self.time_serialize(lambda: PollsSerializer(polls, many=True).data, options['repeat'])
+        reader_time, reader_data = self.time_serialize(lambda: reader.many(rows), options['repeat'])
+
+        renderer = JSONRenderer()
+        if renderer.render(model_data) != renderer.render(reader_data):
+            self.stderr.write(self.style.ERROR("The two serializers render different output."))
+            return
+
+        self.stdout.write(f"{options['rows']} polls per page")
+        self.stdout.write(f"PollsSerializer:     {model_time * 1000:8.2f} ms")
+        self.stdout.write(f"PollsReadSerializer: {reader_time * 1000:8.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {model_time / reader_time:,.1f}x"))
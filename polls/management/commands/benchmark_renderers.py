@@ -0,0 +1,77 @@
+import random
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from polls.renderers import MessagePackRenderer
+
+
+class Command(BaseCommand):
+    """
+    Times rendering a `/results/` payload for a poll with many options,
+    comparing JSON as it was rendered before (UUID objects converted by the
+    encoder hook), JSON with the IDs stringified up front (what
+    `handle_result` returns now) and MessagePack. Reports render time and
+    body size. Runs in memory; the database is not touched.
+    """
+    help = "Benchmark JSON against MessagePack rendering of poll results."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--options', type=int, default=1000, help="Options on the poll, spread over the questions.")
+        parser.add_argument('--questions', type=int, default=10, help="Questions on the poll.")
+        parser.add_argument('--repeat', type=int, default=50, help="Renders per format; the median is reported.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for repeatable runs.")
+
+    def results(self, rng, options, questions, stringify):
+        # Same keys, in the same order, as `handle_result` (built by `tally_polls`)
+        ids = str if stringify else (lambda value: value)
+        per_question = max(options // questions, 1)
+        poll_questions = []
+        for index in range(questions):
+            counts = [rng.randint(0, 10_000) for _ in range(per_question)]
+            total = sum(counts)
+            poll_questions.append({
+                "question_id": ids(uuid.UUID(int=rng.getrandbits(128))),
+                "question_text": f"Question {index}",
+                "total_votes": total,
+                "options": [
+                    {
+                        "option_id": ids(uuid.UUID(int=rng.getrandbits(128))),
+                        "option_text": f"Option {option}",
+                        "vote_count": count,
+                        "percentage": round(count / total * 100, 2) if total else 0,
+                    }
+                    for option, count in enumerate(counts)
+                ],
+            })
+        poll_id = uuid.UUID(int=rng.getrandbits(128))
+        return {"poll_id": ids(poll_id), "poll_title": "Benchmark poll", "questions": poll_questions}
+
+    def time_render(self, renderer, data, repeat):
+        timings, body = [], b''
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = renderer.render(data, renderer.media_type)
+            timings.append(time.perf_counter() - started)
+        return sorted(timings)[len(timings) // 2], len(body)
+
+    def handle(self, *args, **options):
+        cases = [
+            ("JSON, UUID objects", JSONRenderer(), False),
+            ("JSON, string IDs", JSONRenderer(), True),
+            ("MessagePack", MessagePackRenderer(), True),
+        ]
+        self.stdout.write(f"Rendering results for {options['options']:,} options over {options['questions']} questions...")
+
+        measured = []
+        for name, renderer, stringify in cases:
+            data = self.results(random.Random(options['seed']), options['options'], options['questions'], stringify)
+            median, size = self.time_render(renderer, data, options['repeat'])
+            measured.append((name, median, size))
+
+        baseline_time, baseline_size = measured[0][1], measured[0][2]
+        for name, median, size in measured:
+            self.stdout.write(
+                f"{name:<20} {median * 1000:8.2f} ms  {size:>9,} bytes  "
+                f"({baseline_time / median:4.1f}x faster, {size / baseline_size:6.1%} of the size)"
+            )
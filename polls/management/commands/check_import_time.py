@@ -0,0 +1,79 @@
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a gunicorn master does before forking workers (see gunicorn.conf.py)
+BOOT = (
+    "import online_poll_system.wsgi; "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+# Deployment profiles checked, as environment overrides (see settings.API_ONLY)
+PROFILES = {
+    'full': {'API_ONLY': '0'},
+    'API_ONLY': {'API_ONLY': '1'},
+}
+
+
+class Command(BaseCommand):
+    """
+    Import-time budget check for worker boot, meant to run in CI.
+    Profiles a fresh interpreter with `python -X importtime` loading the WSGI
+    app and URLconf, for the full app and for API nodes (`API_ONLY=1`),
+    reports the heaviest packages of each, and fails (exit code 1) when
+    either profile's total import time goes over the budget.
+    """
+    help = "Fail if booting the app spends more than --budget-ms importing modules."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=int, default=settings.IMPORT_TIME_BUDGET_MS, help="Allowed total import time.")
+        parser.add_argument('--runs', type=int, default=3, help="Profile this many times and keep the fastest, to smooth out noise.")
+        parser.add_argument('--top', type=int, default=10, help="Packages to list by import time.")
+
+    def profile(self, overrides):
+        # Returns total import time and self time per top-level package, in microseconds
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT],
+            env={
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'online_poll_system.settings'),
+                **overrides,
+            },
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Booting the app failed:\n{result.stderr[-2000:]}")
+
+        total, by_package = 0, Counter()
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if not match:
+                continue
+            self_us, cumulative_us, indent, module = match.groups()
+            by_package[module.split('.')[0]] += int(self_us)
+            if not indent:
+                total += int(cumulative_us)
+        return total, by_package
+
+    def handle(self, *args, **options):
+        budget = options['budget_ms']
+        over = []
+        for name, overrides in PROFILES.items():
+            total, by_package = min((self.profile(overrides) for _ in range(options['runs'])), key=lambda run: run[0])
+
+            self.stdout.write(f"{name} profile, top {options['top']} packages by import time:")
+            for package, self_us in by_package.most_common(options['top']):
+                self.stdout.write(f"  {self_us / 1000:8.1f} ms  {package}")
+
+            total_ms = total / 1000
+            self.stdout.write(f"{name} profile import time {total_ms:.0f} ms (budget {budget} ms).")
+            if total_ms > budget:
+                over.append(f"{name} ({total_ms:.0f} ms)")
+
+        if over:
+            raise CommandError(f"Import time is over the {budget} ms budget: {', '.join(over)}.")
+        self.stdout.write(self.style.SUCCESS(f"Both profiles are within the {budget} ms budget."))
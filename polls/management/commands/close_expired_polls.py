@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from polls.services import close_expired_polls
+
+
+class Command(BaseCommand):
+    """
+    Closes polls whose `expires_at` has passed.
+    Run once from cron, or with --loop as a long-lived scheduler process.
+    """
+    help = "Close polls whose expiry time has passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Polls closed per UPDATE.")
+        parser.add_argument('--loop', action='store_true', help="Keep running instead of exiting after one pass.")
+        parser.add_argument('--interval', type=float, default=30, help="Seconds to sleep between passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            closed = close_expired_polls(batch_size=options['batch_size'])
+            if closed or not options['loop']:
+                self.stdout.write(f"Closed {closed} expired poll(s).")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from online_poll_system.openapi import generate_schema
+
+
+class Command(BaseCommand):
+    """
+    Writes the OpenAPI schema to OPENAPI_SCHEMA_FILE, so web workers serve it
+    without introspecting the API. Run on every deploy, after migrations.
+    """
+    help = "Generate the OpenAPI schema file served at /api/docs/openapi.json."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Write here instead of OPENAPI_SCHEMA_FILE.")
+
+    def handle(self, *args, **options):
+        path = options['output'] or settings.OPENAPI_SCHEMA_FILE
+        content = generate_schema()
+        with open(path, 'wb') as schema_file:
+            schema_file.write(content)
+        self.stdout.write(f"Wrote {len(content):,} bytes to {path}.")
@@ -0,0 +1,44 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from polls.ballot_import import import_ballots, read_ballot_rows
+
+
+class Command(BaseCommand):
+    """
+    Bulk-imports ballots collected offline from a CSV or NDJSON file.
+    The file is streamed and validated in chunks, staged with COPY and
+    merged in one transaction (see `polls.ballot_import`).
+    """
+    help = "Import offline votes and ranked ballots from a CSV (question_id,option_id|ranking,user_id|guest_id[,created_at]) or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or - for stdin.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows validated and copied per chunk.")
+        parser.add_argument('--allow-closed', action='store_true', help="Accept ballots for polls that have closed or expired since.")
+        parser.add_argument('--dry-run', action='store_true', help="Run the whole import, then roll it back.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f"Cannot open {path}: {exc}")
+
+        with stream:
+            summary = import_ballots(
+                read_ballot_rows(stream, fmt),
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+                allow_closed=options['allow_closed'],
+            )
+
+        for error in summary['errors']:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        verb = "Would import" if summary['dry_run'] else "Imported"
+        self.stdout.write(
+            f"{verb} {summary['votes']} vote(s) and {summary['ballots']} ranked ballot(s); "
+            f"dropped {summary['duplicates']} duplicate(s), skipped {summary['skipped']} invalid row(s)."
+        )
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from polls.services import purge_deleted_polls
+
+
+class Command(BaseCommand):
+    """
+    Permanently removes polls that were deleted through the API or archived,
+    deleting their votes in small chunks.
+    Run once from cron, or with --loop as a long-lived worker.
+    """
+    help = "Purge deleted and archived polls and their questions, options and votes in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Votes deleted per statement.")
+        parser.add_argument('--limit', type=int, default=None, help="Maximum polls purged per pass.")
+        parser.add_argument('--loop', action='store_true', help="Keep running instead of exiting after one pass.")
+        parser.add_argument('--interval', type=float, default=60, help="Seconds to sleep between passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            purged = purge_deleted_polls(batch_size=options['batch_size'], limit=options['limit'])
+            if purged or not options['loop']:
+                self.stdout.write(f"Purged {purged} deleted or archived poll(s).")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
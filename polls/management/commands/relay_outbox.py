@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from polls.outbox import get_sink, prune_outbox, relay_outbox
+
+
+class Command(BaseCommand):
+    """
+    Publishes pending outbox events (votes, ranked ballots, poll closes)
+    to the configured sink. Run with --loop as a long-lived relay process.
+    """
+    help = "Relay outbox events to a file, an in-process queue or Celery."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sink', help="file, queue, celery or a dotted sink class path (default: OUTBOX_SINK).")
+        parser.add_argument('--batch-size', type=int, default=500, help="Events published per transaction.")
+        parser.add_argument('--loop', action='store_true', help="Keep running instead of exiting after one pass.")
+        parser.add_argument('--interval', type=float, default=1, help="Seconds to sleep between passes with --loop.")
+        parser.add_argument('--prune-days', type=int, default=7, help="Delete events published more than this many days ago.")
+
+    def handle(self, *args, **options):
+        sink = get_sink(options['sink'])
+        while True:
+            published = relay_outbox(sink, batch_size=options['batch_size'])
+            if published or not options['loop']:
+                self.stdout.write(f"Published {published} event(s).")
+            prune_outbox(options['prune_days'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
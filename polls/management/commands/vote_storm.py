@@ -0,0 +1,267 @@
+import http.client
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from polls.management.local_client import local_client
+from polls.models import Options, Polls, Questions
+from polls.services import soft_delete_poll
+from user.models import User
+
+PASSWORD = 'storm-password'
+
+
+class TestClientTransport:
+    """
+    Sends requests through Django's test client, in this process.
+    Server-side exceptions surface here, so database lock and
+    deadlock timeouts can be told apart from other failures.
+    """
+    def __init__(self):
+        self.client = local_client(raise_request_exception=True)
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        try:
+            response = getattr(self.client, method)(
+                path, data=json.dumps(data) if data is not None else None,
+                content_type='application/json', secure=True, **headers
+            )
+        except OperationalError:
+            return 'lock_timeout', None
+        except Exception:
+            return 'server_error', None
+        return response.status_code, response.content
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPTransport:
+    """
+    Sends requests to a running server (`--url`) with the standard library.
+    Requests that exceed `--timeout` count as timeouts; refused, reset or
+    dropped connections count as connection errors.
+    """
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, data=None, token=None):
+        request = urllib.request.Request(
+            self.base_url + path, method=method.upper(),
+            data=json.dumps(data).encode() if data is not None else None,
+            headers={'Content-Type': 'application/json', **({'Authorization': f'Bearer {token}'} if token else {})},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+        except urllib.error.URLError as error:
+            # Connect failures arrive wrapped; a connect timeout is still a timeout
+            return ('timeout' if isinstance(error.reason, TimeoutError) else 'connection_error'), None
+        except TimeoutError:
+            return 'timeout', None
+        except (OSError, http.client.HTTPException):
+            return 'connection_error', None
+
+    def close(self):
+        pass
+
+
+def outcome(kind, status, body):
+    # Buckets a response for the report
+    if status in ('lock_timeout', 'server_error', 'timeout', 'connection_error'):
+        return status
+    if 200 <= status < 300:
+        return 'ok'
+    if status == 400 and kind == 'vote' and b'already voted' in (body or b''):
+        return 'duplicate'
+    if status == 429:
+        return 'throttled'
+    if status >= 500:
+        return 'server_error'
+    return f'http_{status}'
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Command(BaseCommand):
+    """
+    Simulates a vote storm: N concurrent users log in (through `login_user`)
+    and vote as fast as they can, choosing questions with Zipf skew so a few
+    questions run hot, while reader clients poll `/results/`.
+    Reports throughput, outcomes (duplicate-vote rejections, throttling,
+    lock timeouts, timeouts, connection errors) and latency percentiles per request kind.
+
+    Runs in-process through the test client by default, or against a
+    running server with --url. Vote and results throttles apply as
+    configured; raise THROTTLE_* in the environment to measure the app
+    rather than the rate limits.
+    """
+    help = "Generate concurrent vote load against a poll and report latency and error rates."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Concurrent simulated voters.")
+        parser.add_argument('--readers', type=int, default=5, help="Concurrent clients polling /results/.")
+        parser.add_argument('--duration', type=float, default=30, help="Seconds to run after everyone has logged in.")
+        parser.add_argument('--questions', type=int, default=10, help="Questions on the generated poll.")
+        parser.add_argument('--options', type=int, default=4, help="Options per generated question.")
+        parser.add_argument('--question-type', choices=[Questions.SINGLE, Questions.MULTIPLE], default=Questions.MULTIPLE,
+                            help="Single-choice questions turn repeat votes into duplicate rejections.")
+        parser.add_argument('--zipf', type=float, default=1.2, help="Skew of votes across questions (0 = uniform).")
+        parser.add_argument('--think-ms', type=float, default=0, help="Pause between a client's requests.")
+        parser.add_argument('--url', help="Base URL of a running server; omit to use the in-process test client.")
+        parser.add_argument('--timeout', type=float, default=10, help="HTTP timeout with --url.")
+        parser.add_argument('--keep', action='store_true', help="Keep the generated poll instead of deleting it afterwards.")
+        parser.add_argument('--seed', type=int, help="Random seed, for repeatable runs.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['questions'] < 1 or options['options'] < 1:
+            raise CommandError("--users, --questions and --options must be at least 1.")
+        self.rng = random.Random(options['seed'])
+        self.options = options
+
+        users = self.ensure_users(options['users'])
+        poll, questions = self.create_poll(users[0], options)
+        self.stdout.write(f"Poll {poll.pk}: {len(questions)} questions, {len(users)} voters, {options['readers']} readers")
+
+        weights = [1 / (rank ** options['zipf']) for rank in range(1, len(questions) + 1)]
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(Counter)
+        self.lock = threading.Lock()
+        # The storm starts once every voter has logged in
+        clients = options['users'] + options['readers']
+        self.logged_in = threading.Barrier(clients, action=self.start_clock)
+
+        try:
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                futures = [pool.submit(self.voter, user, poll, questions, weights) for user in users]
+                futures += [pool.submit(self.reader, poll) for _ in range(options['readers'])]
+                for future in futures:
+                    future.result()
+            self.report(time.perf_counter() - self.started)
+        finally:
+            if not options['keep']:
+                soft_delete_poll(poll)
+
+    def start_clock(self):
+        self.started = time.perf_counter()
+        self.deadline = self.started + self.options['duration']
+
+    def ensure_users(self, count):
+        # Reuses the storm users across runs; hashes the shared password once
+        usernames = [f'storm-user-{index}' for index in range(count)]
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            [User(username=username, email=f'{username}@storm.invalid', password=password) for username in usernames],
+            ignore_conflicts=True,
+        )
+        return list(User.objects.filter(username__in=usernames).order_by('username'))
+
+    def create_poll(self, owner, options):
+        poll = Polls.objects.create(title="Vote storm", description="Generated by vote_storm", created_by=owner, is_public=True)
+        questions = Questions.objects.bulk_create([
+            Questions(poll_id=poll, question_text=f"Storm question {index}", question_type=options['question_type'])
+            for index in range(options['questions'])
+        ])
+        option_rows = Options.objects.bulk_create([
+            Options(question_id=question, option_text=f"Option {index}")
+            for question in questions for index in range(options['options'])
+        ])
+        option_ids = defaultdict(list)
+        for option in option_rows:
+            option_ids[option.question_id.pk].append(str(option.option_id))
+        return poll, [(str(question.pk), option_ids[question.pk]) for question in questions]
+
+    def transport(self):
+        if self.options['url']:
+            return HTTPTransport(self.options['url'], self.options['timeout'])
+        return TestClientTransport()
+
+    def timed(self, transport, kind, method, path, data=None, token=None):
+        started = time.perf_counter()
+        status, body = transport.request(method, path, data, token)
+        latency = time.perf_counter() - started
+        result = outcome(kind, status, body)
+        with self.lock:
+            self.latencies[kind].append(latency)
+            self.outcomes[kind][result] += 1
+        return result, body
+
+    def at_start_line(self):
+        # Waits for every client to log in; False if one failed, which reports its own error
+        try:
+            self.logged_in.wait()
+        except threading.BrokenBarrierError:
+            return False
+        return True
+
+    def running(self):
+        if self.options['think_ms']:
+            time.sleep(self.options['think_ms'] / 1000)
+        return time.perf_counter() < self.deadline
+
+    def voter(self, user, poll, questions, weights):
+        transport = self.transport()
+        rng = random.Random(self.rng.random())
+        try:
+            result, body = self.timed(transport, 'login', 'post', '/api/user/login/', {'username': user.username, 'password': PASSWORD})
+            if result != 'ok':
+                raise CommandError(f"{user.username} could not log in ({result}): {(body or b'')[:200]!r}")
+            token = json.loads(body)['access']
+            if not self.at_start_line():
+                return
+            while self.running():
+                question_id, option_ids = rng.choices(questions, weights)[0]
+                path = f'/api/polls/{poll.pk}/questions/{question_id}/vote/'
+                self.timed(transport, 'vote', 'post', path, {'option_id': rng.choice(option_ids)}, token)
+        except Exception:
+            # Don't leave the other clients waiting at the start line
+            self.logged_in.abort()
+            raise
+        finally:
+            transport.close()
+
+    def reader(self, poll):
+        transport = self.transport()
+        try:
+            if not self.at_start_line():
+                return
+            while self.running():
+                self.timed(transport, 'results', 'get', f'/api/polls/{poll.pk}/results/')
+        except Exception:
+            self.logged_in.abort()
+            raise
+        finally:
+            transport.close()
+
+    def report(self, elapsed):
+        self.stdout.write(f"\nRan for {elapsed:.1f}s")
+        for kind in ('login', 'vote', 'results'):
+            latencies = sorted(self.latencies[kind])
+            if not latencies:
+                continue
+            outcomes = self.outcomes[kind]
+            total = sum(outcomes.values())
+            rate = f", {total / elapsed:.1f} req/s" if kind != 'login' else ''
+            self.stdout.write(f"\n{kind}: {total} requests{rate}")
+            for name, count in outcomes.most_common():
+                self.stdout.write(f"  {name:<16} {count:>8}  {count / total:7.2%}")
+            self.stdout.write(
+                "  latency ms       p50 {:.1f}  p90 {:.1f}  p99 {:.1f}  max {:.1f}".format(
+                    *(percentile(latencies, fraction) * 1000 for fraction in (0.5, 0.9, 0.99)), latencies[-1] * 1000
+                )
+            )
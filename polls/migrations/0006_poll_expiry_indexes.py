@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_polls_is_public'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='options',
+            index=models.Index(fields=['question_id'], name='options_questio_a62927_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='polls',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['-created_at'], name='polls_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='polls',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['expires_at'], name='polls_open_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='votes',
+            index=models.Index(fields=['option_id'], name='votes_option__7d4503_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0006_poll_expiry_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='polls',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
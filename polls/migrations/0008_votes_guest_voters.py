@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_polls_last_modified'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='votes',
+            name='guest_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='votes',
+            name='user_id',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='votes_cast', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='votes',
+            index=models.Index(condition=models.Q(('guest_id__isnull', False)), fields=['guest_id'], name='votes_guest_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='votes',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('guest_id__isnull', True), ('user_id__isnull', False)), models.Q(('guest_id__isnull', False), ('user_id__isnull', True)), _connector='OR'), name='votes_single_voter'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0010_polls_soft_delete'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPoll',
+            fields=[
+                ('poll_id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('is_public', models.BooleanField(default=True)),
+                ('results', models.JSONField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Poll',
+                'verbose_name_plural': 'Archived Polls',
+                'db_table': 'archived_polls',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='polls',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='polls',
+            index=models.Index(condition=models.Q(('archived_at__isnull', False)), fields=['archived_at'], name='polls_archived_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedpoll',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_polls', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
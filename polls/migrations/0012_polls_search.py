@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Same document as PollQuerySet.refresh_search_vector(), for existing rows
+BACKFILL_SEARCH_VECTORS = """
+UPDATE polls SET search_vector =
+    setweight(to_tsvector('english', COALESCE(title, '')), 'A')
+    || setweight(to_tsvector('english', COALESCE(description, '')), 'B')
+    || setweight(to_tsvector('english', COALESCE(
+        (SELECT string_agg(q.question_text, ' ') FROM questions q WHERE q.poll_id_id = polls.poll_id), ''
+    )), 'C');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0011_archived_polls'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='polls',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='polls',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='polls_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='polls',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='polls_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTORS, migrations.RunSQL.noop),
+    ]
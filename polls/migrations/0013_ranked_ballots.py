@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:22
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0012_polls_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='questions',
+            name='question_type',
+            field=models.CharField(choices=[('single', 'Single Choice'), ('multiple', 'Multiple Choice'), ('ranked', 'Ranked Choice')], default='single', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='RankedBallot',
+            fields=[
+                ('ballot_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('guest_id', models.UUIDField(blank=True, null=True)),
+                ('ranking', django.contrib.postgres.fields.ArrayField(base_field=models.SmallIntegerField(), size=None)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('question_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranked_ballots', to='polls.questions')),
+                ('user_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ranked_ballots_cast', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ranked Ballot',
+                'verbose_name_plural': 'Ranked Ballots',
+                'db_table': 'ranked_ballots',
+                'ordering': ['question_id', 'ballot_id'],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('guest_id__isnull', True), ('user_id__isnull', False)), models.Q(('guest_id__isnull', False), ('user_id__isnull', True)), _connector='OR'), name='ranked_ballots_single_voter'), models.UniqueConstraint(condition=models.Q(('user_id__isnull', False)), fields=('question_id', 'user_id'), name='ranked_ballots_one_per_user'), models.UniqueConstraint(condition=models.Q(('guest_id__isnull', False)), fields=('question_id', 'guest_id'), name='ranked_ballots_one_per_guest')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RankedBallotPattern',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ranking', django.contrib.postgres.fields.ArrayField(base_field=models.SmallIntegerField(), size=None)),
+                ('ballot_count', models.PositiveIntegerField(default=0)),
+                ('question_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ballot_patterns', to='polls.questions')),
+            ],
+            options={
+                'verbose_name': 'Ranked Ballot Pattern',
+                'verbose_name_plural': 'Ranked Ballot Patterns',
+                'db_table': 'ranked_ballot_patterns',
+                'ordering': ['question_id', 'id'],
+                'constraints': [models.UniqueConstraint(fields=('question_id', 'ranking'), name='ranked_ballot_patterns_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0014_outbox_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rankedballot',
+            index=models.Index(fields=['user_id', 'created_at'], name='ranked_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='votes',
+            index=models.Index(fields=['user_id', 'created_at'], name='votes_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0015_vote_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollTrend',
+            fields=[
+                ('poll_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='polls.polls')),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Poll Trend',
+                'verbose_name_plural': 'Poll Trends',
+                'db_table': 'poll_trends',
+                'ordering': ['-score', 'poll_id'],
+                'indexes': [models.Index(fields=['-score', 'poll_id'], name='poll_trends_score_idx')],
+            },
+        ),
+    ]
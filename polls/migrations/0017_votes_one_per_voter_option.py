@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Keeps each voter's earliest vote per option; later copies are duplicates
+# left by retried or concurrent requests
+DELETE_DUPLICATE_VOTES = """
+    DELETE FROM votes v
+    USING votes earlier
+    WHERE earlier.option_id_id = v.option_id_id
+      AND (earlier.user_id_id = v.user_id_id OR earlier.guest_id = v.guest_id)
+      AND (earlier.created_at, earlier.vote_id) < (v.created_at, v.vote_id)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0016_poll_trends'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(DELETE_DUPLICATE_VOTES, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='votes',
+            constraint=models.UniqueConstraint(condition=models.Q(('user_id__isnull', False)), fields=('option_id', 'user_id'), name='votes_one_per_user_option'),
+        ),
+        migrations.AddConstraint(
+            model_name='votes',
+            constraint=models.UniqueConstraint(condition=models.Q(('guest_id__isnull', False)), fields=('option_id', 'guest_id'), name='votes_one_per_guest_option'),
+        ),
+    ]
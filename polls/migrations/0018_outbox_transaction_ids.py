@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:10
+
+import polls.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0017_votes_one_per_voter_option'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboxevent',
+            name='outbox_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='xact_id',
+            field=polls.models.TransactionIdField(db_default=models.Func(function='pg_current_xact_id'), editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(condition=models.Q(('published_at__isnull', True)), fields=['xact_id', 'id'], name='outbox_pending_idx'),
+        ),
+    ]
@@ -1,7 +1,56 @@
-from django.db import models
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Func, Q, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from user.models import User
+from .signals import poll_closed
 import uuid
 
+# Text search configuration for poll search vectors and queries
+SEARCH_CONFIG = 'english'
+
+class PollQuerySet(models.QuerySet):
+    """
+    Query helpers for the poll lifecycle.
+    """
+    def live(self):
+        # Hides polls that were deleted or archived and are waiting for the background purge
+        return self.filter(deleted_at__isnull=True, archived_at__isnull=True)
+
+    def open(self):
+        # Polls still accepting votes: not closed and not past their expiry.
+        # Keeps `is_closed=False` in the WHERE clause so the partial indexes apply.
+        return self.filter(is_closed=False).filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+        )
+
+    def due(self, now=None):
+        # Open polls whose expiry time has passed and should now be closed.
+        return self.filter(is_closed=False, expires_at__lte=now or timezone.now())
+
+    def refresh_search_vector(self, **fields):
+        # Rebuilds `search_vector` in one UPDATE: title (weight A), description (B)
+        # and the poll's question texts (C), aggregated in a correlated subquery.
+        # Extra `fields` are written in the same UPDATE.
+        question_text = Subquery(
+            Questions.objects.filter(poll_id=OuterRef('pk'))
+            .order_by()
+            .values('poll_id')
+            .annotate(text=StringAgg('question_text', ' '))
+            .values('text'),
+            output_field=models.TextField(),
+        )
+        return self.update(search_vector=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+            + SearchVector(Coalesce(question_text, Value(''), output_field=models.TextField()), weight='C', config=SEARCH_CONFIG)
+        ), **fields)
+
 class Polls(models.Model):
     """
     Represents a poll created by a user,
@@ -15,11 +64,26 @@ class Polls(models.Model):
     expires_at = models.DateTimeField(null=True, blank=True)
     is_closed = models.BooleanField(default=False)
     is_public = models.BooleanField(default=True)
+    # Bumped on every change to the poll, its questions or their options;
+    # drives ETag/Last-Modified on poll and question reads
+    last_modified = models.DateTimeField(auto_now=True)
+    # Set when the poll is deleted; the rows are purged in chunks later
+    # by `purge_deleted_polls` so large polls never cascade in one request
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    # Set once the poll has been copied to `ArchivedPoll`; the hot rows are then purged
+    archived_at = models.DateTimeField(null=True, blank=True)
+    # Full-text search document, kept current on write (see `refresh_search_vector`)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PollQuerySet.as_manager()
 
     def close(self):
-        """Mark the poll as closed and save the change."""
+        """Mark the poll as closed, save the change and fire the post-close hooks."""
         self.is_closed = True
-        self.save()
+        with transaction.atomic():
+            self.save()
+            OutboxEvent.for_poll_closed(self.poll_id, self.last_modified).save()
+        poll_closed.send(sender=Polls, poll_ids=[self.poll_id])
 
     def __str__(self):
         return f"{self.title} by {self.created_by}"
@@ -29,18 +93,32 @@ class Polls(models.Model):
         verbose_name = 'Poll'
         verbose_name_plural = 'Polls'
         ordering = ['-created_at']
+        indexes = [
+            # Backs the `?active=true` listing (newest first)
+            models.Index(fields=['-created_at'], condition=Q(is_closed=False), name='polls_open_created_idx'),
+            # Lets the expiry scheduler find due polls without scanning closed ones
+            models.Index(fields=['expires_at'], condition=Q(is_closed=False), name='polls_open_expiry_idx'),
+            # Lets the purge job find soft-deleted polls
+            models.Index(fields=['deleted_at'], condition=Q(deleted_at__isnull=False), name='polls_deleted_idx'),
+            models.Index(fields=['archived_at'], condition=Q(archived_at__isnull=False), name='polls_archived_idx'),
+            # `?search=` full-text matches, and the trigram fallback for prefixes
+            GinIndex(fields=['search_vector'], name='polls_search_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='polls_title_trgm_idx'),
+        ]
 
 class Questions(models.Model):
     """
     Represents a single question under a poll,
     which contains one or more options.
-    could be multi or single choice depending on the question_type
+    could be multi, single or ranked choice depending on the question_type
     """
     SINGLE = 'single'
     MULTIPLE = 'multiple'
+    RANKED = 'ranked'
     QUESTION_TYPE_CHOICES = [
         (SINGLE, 'Single Choice'),
         (MULTIPLE, 'Multiple Choice'),
+        (RANKED, 'Ranked Choice'),
     ]
     question_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, db_index=True)
     poll_id = models.ForeignKey(Polls, related_name='questions', on_delete=models.CASCADE)
@@ -50,6 +128,11 @@ class Questions(models.Model):
 
     def __str__(self):
         return self.question_text
+
+    def options_locked(self):
+        # Ranked ballots store option indexes (see `RankedBallot.ranking`), so
+        # once any are cast, adding or removing an option would remap them
+        return self.question_type == self.RANKED and self.ranked_ballots.exists()
     
     class Meta:
         db_table = 'questions'
@@ -69,6 +152,10 @@ class Options(models.Model):
 
     def __str__(self):
         return self.option_text
+
+    def clean(self):
+        if self._state.adding and self.question_id_id and self.question_id.options_locked():
+            raise ValidationError("Options can't be added to a ranked question that has ballots.")
     
     class Meta:
         db_table = 'options'
@@ -86,11 +173,14 @@ class Votes(models.Model):
     """
     vote_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, db_index=True)
     option_id = models.ForeignKey(Options, related_name='votes', on_delete=models.CASCADE)
-    user_id = models.ForeignKey(User, on_delete=models.CASCADE, related_name='votes_cast')
+    user_id = models.ForeignKey(User, on_delete=models.CASCADE, related_name='votes_cast', null=True, blank=True)
+    # Set instead of user_id for guest votes cast with a signed voter token
+    guest_id = models.UUIDField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Vote by {self.user_id} for {self.option_id}"
+        voter = self.user_id if self.user_id_id else f"guest {self.guest_id}"
+        return f"Vote by {voter} for {self.option_id}"
     
     class Meta:
         db_table = 'votes'
@@ -99,4 +189,229 @@ class Votes(models.Model):
         ordering = ['option_id', 'vote_id']
         indexes = [
             models.Index(fields=['option_id']),
+            # Duplicate-vote checks for guest voters
+            models.Index(fields=['guest_id'], condition=Q(guest_id__isnull=False), name='votes_guest_idx'),
+            # A user's voting history, newest first, and their latest vote time
+            models.Index(fields=['user_id', 'created_at'], name='votes_user_created_idx'),
+        ]
+        constraints = [
+            # Every vote belongs to exactly one user or one guest
+            models.CheckConstraint(
+                condition=Q(user_id__isnull=False, guest_id__isnull=True) | Q(user_id__isnull=True, guest_id__isnull=False),
+                name='votes_single_voter',
+            ),
+            # One vote per voter and option: retries and concurrent duplicates fail here
+            models.UniqueConstraint(fields=['option_id', 'user_id'], condition=Q(user_id__isnull=False), name='votes_one_per_user_option'),
+            models.UniqueConstraint(fields=['option_id', 'guest_id'], condition=Q(guest_id__isnull=False), name='votes_one_per_guest_option'),
+        ]
+
+
+class RankedBallot(models.Model):
+    """
+    One voter's ballot on a ranked-choice question.
+    `ranking` holds option indexes in preference order, an index being the
+    option's position in the question's options ordered by `option_id`
+    (see `Options.Meta.ordering`). The options are frozen once the first
+    ballot is cast (see `Questions.options_locked`).
+    """
+    ballot_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    question_id = models.ForeignKey(Questions, related_name='ranked_ballots', on_delete=models.CASCADE)
+    user_id = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ranked_ballots_cast', null=True, blank=True)
+    guest_id = models.UUIDField(null=True, blank=True)
+    ranking = ArrayField(models.SmallIntegerField())
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        voter = self.user_id if self.user_id_id else f"guest {self.guest_id}"
+        return f"Ballot by {voter} for {self.question_id}"
+
+    class Meta:
+        db_table = 'ranked_ballots'
+        verbose_name = 'Ranked Ballot'
+        verbose_name_plural = 'Ranked Ballots'
+        ordering = ['question_id', 'ballot_id']
+        indexes = [
+            models.Index(fields=['user_id', 'created_at'], name='ranked_user_created_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(user_id__isnull=False, guest_id__isnull=True) | Q(user_id__isnull=True, guest_id__isnull=False),
+                name='ranked_ballots_single_voter',
+            ),
+            # One ballot per voter and question; these also serve the duplicate checks
+            models.UniqueConstraint(fields=['question_id', 'user_id'], condition=Q(user_id__isnull=False), name='ranked_ballots_one_per_user'),
+            models.UniqueConstraint(fields=['question_id', 'guest_id'], condition=Q(guest_id__isnull=False), name='ranked_ballots_one_per_guest'),
+        ]
+
+class RankedBallotPattern(models.Model):
+    """
+    Number of ballots cast with one exact ranking on a ranked-choice question.
+    Kept up to date as ballots are cast, so instant-runoff results are
+    computed over the distinct rankings instead of every ballot.
+    """
+    question_id = models.ForeignKey(Questions, related_name='ballot_patterns', on_delete=models.CASCADE)
+    ranking = ArrayField(models.SmallIntegerField())
+    ballot_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.ranking} x{self.ballot_count} for {self.question_id}"
+
+    class Meta:
+        db_table = 'ranked_ballot_patterns'
+        verbose_name = 'Ranked Ballot Pattern'
+        verbose_name_plural = 'Ranked Ballot Patterns'
+        ordering = ['question_id', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['question_id', 'ranking'], name='ranked_ballot_patterns_unique'),
+        ]
+
+
+class ArchivedPoll(models.Model):
+    """
+    Cold copy of a closed poll, written by the `archive_polls` job.
+    Keeps the poll's ID and metadata plus a frozen snapshot of its questions,
+    options and final vote tallies, so the hot tables and indexes stay small.
+    """
+    poll_id = models.UUIDField(primary_key=True, editable=False)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_polls')
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField(null=True, blank=True)
+    is_public = models.BooleanField(default=True)
+    # Same shape as the `/results/` response's "questions" list
+    results = models.JSONField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+    class Meta:
+        db_table = 'archived_polls'
+        verbose_name = 'Archived Poll'
+        verbose_name_plural = 'Archived Polls'
+        ordering = ['-created_at']
+
+class PollTemplate(models.Model):
+    """
+    A reusable snapshot of a poll's structure (title, questions and options).
+    Instantiating a template builds a fresh poll from the stored definition
+    without reading the source poll again.
+    """
+    template_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, db_index=True)
+    name = models.CharField(max_length=255)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='poll_templates')
+    # {"title", "description", "is_public", "questions": [{"question_text", "question_type", "options": [{"option_text"}]}]}
+    definition = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        db_table = 'poll_templates'
+        verbose_name = 'Poll Template'
+        verbose_name_plural = 'Poll Templates'
+        ordering = ['-created_at']
+
+class TransactionIdField(models.Field):
+    """
+    PostgreSQL's 64-bit transaction ID (`xid8`). psycopg reads it as text.
+    """
+    def db_type(self, connection):
+        return 'xid8'
+
+
+class OutboxEvent(models.Model):
+    """
+    Change event for downstream consumers, written in the same transaction
+    as the change itself (a vote, a ranked ballot or a poll closing), so an
+    event exists if and only if the change committed.
+    `relay_outbox` publishes pending events in `(xact_id, id)` order, at
+    least once (see `polls.outbox`); consumers deduplicate on `id`.
+    """
+    VOTE_CAST = 'vote.cast'
+    BALLOT_CAST = 'ballot.cast'
+    POLL_CLOSED = 'poll.closed'
+    EVENT_TYPE_CHOICES = [
+        (VOTE_CAST, 'Vote cast'),
+        (BALLOT_CAST, 'Ranked ballot cast'),
+        (POLL_CLOSED, 'Poll closed'),
+    ]
+    event_type = models.CharField(max_length=32, choices=EVENT_TYPE_CHOICES)
+    # Not a foreign key: events outlive purged polls
+    poll_id = models.UUIDField()
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    # ID of the transaction that wrote the event, filled in by the database
+    xact_id = TransactionIdField(db_default=Func(function='pg_current_xact_id'), editable=False)
+
+    def __str__(self):
+        return f"{self.event_type} #{self.pk} for poll {self.poll_id}"
+
+    @classmethod
+    def for_vote(cls, vote, poll_id):
+        return cls(event_type=cls.VOTE_CAST, poll_id=poll_id, payload={
+            'vote_id': str(vote.vote_id),
+            'question_id': str(vote.option_id.question_id_id),
+            'option_id': str(vote.option_id_id),
+            'user_id': str(vote.user_id_id) if vote.user_id_id else None,
+            'guest_id': str(vote.guest_id) if vote.guest_id else None,
+            'created_at': vote.created_at.isoformat(),
+        })
+
+    @classmethod
+    def for_ballot(cls, ballot, poll_id, ranking_option_ids):
+        return cls(event_type=cls.BALLOT_CAST, poll_id=poll_id, payload={
+            'ballot_id': str(ballot.ballot_id),
+            'question_id': str(ballot.question_id_id),
+            'ranking': [str(option_id) for option_id in ranking_option_ids],
+            'user_id': str(ballot.user_id_id) if ballot.user_id_id else None,
+            'guest_id': str(ballot.guest_id) if ballot.guest_id else None,
+            'created_at': ballot.created_at.isoformat(),
+        })
+
+    @classmethod
+    def for_poll_closed(cls, poll_id, closed_at):
+        return cls(event_type=cls.POLL_CLOSED, poll_id=poll_id, payload={
+            'poll_id': str(poll_id),
+            'closed_at': closed_at.isoformat(),
+        })
+
+    class Meta:
+        db_table = 'outbox_events'
+        verbose_name = 'Outbox Event'
+        verbose_name_plural = 'Outbox Events'
+        ordering = ['id']
+        indexes = [
+            # The relay's queue: pending events in delivery order
+            models.Index(fields=['xact_id', 'id'], condition=Q(published_at__isnull=True), name='outbox_pending_idx'),
+            # Pruning of delivered events
+            models.Index(fields=['published_at'], condition=Q(published_at__isnull=False), name='outbox_published_idx'),
+        ]
+
+class PollTrend(models.Model):
+    """
+    A poll's entry on the trending leaderboard: its voting activity with
+    exponential decay, kept up to date as votes come in (see `polls.trending`).
+    `score` is stored in log space relative to a fixed epoch, so it never
+    needs rescaling as time passes and ordering by it ranks polls by
+    current activity.
+    """
+    poll_id = models.OneToOneField(Polls, primary_key=True, related_name='trend', on_delete=models.CASCADE)
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Trend of {self.poll_id}: {self.score:.3f}"
+
+    class Meta:
+        db_table = 'poll_trends'
+        verbose_name = 'Poll Trend'
+        verbose_name_plural = 'Poll Trends'
+        ordering = ['-score', 'poll_id']
+        indexes = [
+            # The leaderboard, read one page at a time
+            models.Index(fields=['-score', 'poll_id'], name='poll_trends_score_idx'),
         ]
@@ -0,0 +1,153 @@
+"""
+Relay for the transactional outbox (see `OutboxEvent`).
+
+`relay_outbox` drains pending events in order, in batches locked with
+`SELECT ... FOR UPDATE SKIP LOCKED`, hands each batch to a sink and marks it
+published in the same transaction. If publishing fails, the transaction
+rolls back and the batch is retried on the next pass, so delivery is
+at least once.
+
+The order is `(xact_id, id)`: by the transaction that wrote the event, then
+by insertion within it. `id`s alone are taken at insert rather than at
+commit, so a long transaction (a ballot import, a clone with votes) could
+commit low `id`s after higher ones were published. The relay therefore only
+takes events whose transaction is older than every transaction still in
+progress (`pg_snapshot_xmin`); anything written later sorts after them, so
+nothing can appear behind an event already published. The cost is that
+events wait while an older transaction is open. Run a single relay for
+strict ordering; extra relays skip the locked batch and take the next one.
+
+Sinks take a list of messages and must raise if they could not deliver them.
+"""
+import json
+import os
+import queue
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import OutboxEvent
+
+# Oldest transaction still in progress: every transaction below it has ended
+SNAPSHOT_XMIN = RawSQL('pg_snapshot_xmin(pg_current_snapshot())', [])
+
+
+def message(event):
+    # Wire format of an event, as consumers receive it
+    return {
+        'id': event.id,
+        'type': event.event_type,
+        'poll_id': str(event.poll_id),
+        'payload': event.payload,
+        'created_at': event.created_at.isoformat(),
+    }
+
+
+class FileSink:
+    """
+    Appends events as JSON lines to `path`, synced to disk before the
+    batch is marked published.
+    """
+    def __init__(self, path=None):
+        self.path = path or settings.OUTBOX_FILE
+
+    def publish(self, messages):
+        with open(self.path, 'a', encoding='utf-8') as outbox_file:
+            outbox_file.writelines(json.dumps(message) + '\n' for message in messages)
+            outbox_file.flush()
+            os.fsync(outbox_file.fileno())
+
+
+class QueueSink:
+    """
+    Puts events on an in-process `queue.Queue`, looked up by name with
+    `QueueSink.get_queue()`. For consumers running in the relay's process.
+    """
+    queues = {}
+
+    def __init__(self, name='default'):
+        self.queue = self.get_queue(name)
+
+    @classmethod
+    def get_queue(cls, name='default'):
+        return cls.queues.setdefault(name, queue.Queue())
+
+    def publish(self, messages):
+        for message in messages:
+            self.queue.put(message)
+
+
+class CelerySink:
+    """
+    Sends each batch as one Celery task (`OUTBOX_CELERY_TASK`, called with
+    the list of messages), so a worker sees the batch in order.
+    Celery is only imported when this sink is used.
+    """
+    def __init__(self, task_name=None, broker_url=None):
+        from celery import Celery
+
+        self.task_name = task_name or settings.OUTBOX_CELERY_TASK
+        self.app = Celery('online_poll_system', broker=broker_url or settings.CELERY_BROKER_URL)
+
+    def publish(self, messages):
+        self.app.send_task(self.task_name, args=[messages])
+
+
+SINKS = {
+    'file': FileSink,
+    'queue': QueueSink,
+    'celery': CelerySink,
+}
+
+
+def get_sink(name=None):
+    """
+    Builds the sink named `name` (`file`, `queue` or `celery`), or given as a
+    dotted path to a class; defaults to `OUTBOX_SINK`.
+    """
+    name = name or settings.OUTBOX_SINK
+    sink_class = SINKS.get(name) or import_string(name)
+    return sink_class()
+
+
+def relay_outbox(sink, batch_size=500):
+    """
+    Publishes every pending outbox event to `sink`.
+
+    - One transaction per batch: lock up to `batch_size` pending events
+      (`SKIP LOCKED`), publish them, mark them published
+    - Events go out in `(xact_id, id)` order; events of transactions that
+      may still be in progress, or that began after one that may, are left
+      for a later pass
+    - Uses the partial index on pending events, so the main tables are never read
+    - Returns the number of events published
+    """
+    published = 0
+    while True:
+        with transaction.atomic():
+            events = list(
+                OutboxEvent.objects.filter(published_at__isnull=True, xact_id__lt=SNAPSHOT_XMIN)
+                .order_by('xact_id', 'id')
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not events:
+                break
+            sink.publish([message(event) for event in events])
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(published_at=timezone.now())
+
+        published += len(events)
+        if len(events) < batch_size:
+            break
+    return published
+
+
+def prune_outbox(older_than_days):
+    """
+    Deletes events published more than `older_than_days` ago.
+    Returns the number of events deleted.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = OutboxEvent.objects.filter(published_at__lt=cutoff).delete()
+    return deleted
@@ -1,4 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from .visibility import get_poll_visibility, can_view_poll
+from .guests import get_guest
 
 class PollPermission(BasePermission):
     """
@@ -17,10 +19,11 @@ class PollPermission(BasePermission):
         if request.user.is_superuser:
             return True
 
+        # Compare ids so the creator is never loaded
         if request.method in SAFE_METHODS:
-            return obj.is_public or obj.created_by == request.user
+            return obj.is_public or obj.created_by_id == request.user.pk
 
-        return obj.created_by == request.user
+        return obj.created_by_id == request.user.pk
     
 class QuestionPermission(BasePermission):
     """
@@ -40,27 +43,34 @@ class QuestionPermission(BasePermission):
         if request.user.is_superuser:
             return True
 
-        poll = obj.poll_id  # Get related poll
+        # Cached poll metadata, looked up by id instead of loading the poll
+        poll = get_poll_visibility(obj.poll_id_id)
+        if poll is None:
+            return False
 
         if request.method in SAFE_METHODS:
-            return poll.is_public or poll.created_by == request.user
+            return can_view_poll(poll, request.user)
 
-        return poll.created_by == request.user
+        return poll.owner_id == request.user.pk
 
 class VotePermission(BasePermission):
     """
     Permissions:
     - Any authenticated user can vote (POST)
+    - Guests with a signed guest token can vote on public polls
     - Only the vote creator can update/delete their vote (if supported)
     """
     def has_permission(self, request, view):
+        if get_guest(request):
+            return True
         return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
         if request.user.is_superuser:
             return True
 
-        poll = obj.poll_id  # Get related poll
+        poll = get_poll_visibility(obj.poll_id_id)  # Cached metadata of the related poll
 
         # Only allow voting on public polls or polls created by the user
-        return poll.is_public or poll.created_by == request.user
+        # (guests are anonymous, so they only pass on public polls)
+        return poll is not None and can_view_poll(poll, request.user)
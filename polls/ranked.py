@@ -0,0 +1,129 @@
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import RankedBallotPattern
+
+
+def instant_runoff(patterns, candidates):
+    """
+    Runs an instant-runoff count over grouped ballots.
+
+    - `patterns` is an iterable of (ranking, count) pairs, a ranking being a
+      sequence of candidates in preference order; identical ballots arrive
+      as one pattern, so the work is bounded by the number of distinct
+      rankings, not the number of voters
+    - Each round, patterns sit in the pile of their highest continuing
+      choice; eliminating a candidate only moves that candidate's pile
+    - A candidate wins with more than half of the non-exhausted ballots,
+      or as the last one standing; if all remaining candidates tie, there
+      is no winner
+    - The last-placed candidate is eliminated each round. Candidates tied
+      for last are eliminated together only when their combined tally is
+      still below the next-lowest one, so none of them could have
+      survived; otherwise one of them is eliminated by `break_tie`
+    - Returns (winner or None, rounds), each round being
+      {'tallies': {candidate: count}, 'exhausted': count, 'eliminated': [candidates]}
+    """
+    continuing = set(candidates)
+    piles = {candidate: [] for candidate in continuing}
+    tallies = Counter({candidate: 0 for candidate in continuing})
+    exhausted = 0
+
+    def place(ranking, position, count):
+        # Moves a pattern to its next continuing choice, or exhausts it
+        nonlocal exhausted
+        for position in range(position, len(ranking)):
+            choice = ranking[position]
+            if choice in continuing:
+                piles[choice].append((ranking, position, count))
+                tallies[choice] += count
+                return
+        exhausted += count
+
+    for ranking, count in patterns:
+        place(ranking, 0, count)
+
+    rounds = []
+    while continuing:
+        active = sum(tallies[candidate] for candidate in continuing)
+        current = {candidate: tallies[candidate] for candidate in continuing}
+        round_result = {'tallies': current, 'exhausted': exhausted, 'eliminated': []}
+        rounds.append(round_result)
+
+        leader = max(current, key=current.get)
+        if current[leader] * 2 > active or len(continuing) == 1:
+            return (leader if active else None), rounds
+
+        lowest = min(current.values())
+        eliminated = sorted(candidate for candidate in continuing if current[candidate] == lowest)
+        if len(eliminated) == len(continuing):
+            return None, rounds
+        if len(eliminated) > 1:
+            next_lowest = min(tally for tally in current.values() if tally > lowest)
+            if lowest * len(eliminated) >= next_lowest:
+                eliminated = [break_tie(eliminated, rounds)]
+        round_result['eliminated'] = eliminated
+
+        continuing.difference_update(eliminated)
+        for candidate in eliminated:
+            for ranking, position, count in piles.pop(candidate):
+                place(ranking, position + 1, count)
+            del tallies[candidate]
+
+    return None, rounds
+
+
+def break_tie(tied, rounds):
+    """
+    Picks which of the candidates tied for last is eliminated: the one with
+    the fewest votes in the most recent earlier round where they differ,
+    and failing that the one listed last (the highest option index).
+    """
+    for previous in reversed(rounds[:-1]):
+        fewest = min(previous['tallies'][candidate] for candidate in tied)
+        tied = [candidate for candidate in tied if previous['tallies'][candidate] == fewest]
+        if len(tied) == 1:
+            return tied[0]
+    return max(tied)
+
+
+def ranked_tallies(option_counts):
+    """
+    Computes instant-runoff results for many ranked questions at once.
+
+    - `option_counts` maps each question ID to its number of options
+    - Reads the grouped `RankedBallotPattern` counts of every question in one
+      query; raw ballots are never loaded
+    - Candidates are option indexes (see `RankedBallot.ranking`)
+    - Returns a dict of question ID -> (ballot count, winner index, rounds)
+    """
+    patterns = {question_id: [] for question_id in option_counts}
+    rows = (
+        RankedBallotPattern.objects.filter(question_id__in=list(option_counts))
+        .values_list('question_id', 'ranking', 'ballot_count')
+    )
+    for question_id, ranking, ballot_count in rows:
+        patterns[question_id].append((ranking, ballot_count))
+
+    results = {}
+    for question_id, question_patterns in patterns.items():
+        winner, rounds = instant_runoff(question_patterns, range(option_counts[question_id]))
+        ballots = sum(count for _, count in question_patterns)
+        results[question_id] = (ballots, winner, rounds)
+    return results
+
+
+def count_ballot(question_id, ranking, count=1):
+    """
+    Adds `count` ballots to the pattern for `ranking`, creating it on first use.
+    Call inside the transaction that stores the ballots.
+    """
+    patterns = RankedBallotPattern.objects.filter(question_id=question_id, ranking=ranking)
+    if patterns.update(ballot_count=F('ballot_count') + count):
+        return
+    try:
+        with transaction.atomic():
+            RankedBallotPattern.objects.create(question_id_id=question_id, ranking=ranking, ballot_count=count)
+    except IntegrityError:
+        # Another ballot created the pattern in the meantime
+        patterns.update(ballot_count=F('ballot_count') + count)
@@ -0,0 +1,84 @@
+from weakref import WeakKeyDictionary
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Polls, Questions, Options
+from .signals import poll_closed
+from .visibility import invalidate_poll_visibility
+
+
+def _cascading_from_poll(kwargs):
+    # True when the delete is part of a whole poll being removed,
+    # where touching that poll for every question and option is wasted work
+    origin = kwargs.get('origin')
+    return getattr(origin, 'model', type(origin)) is Polls
+
+
+@receiver([post_save, post_delete], sender=Questions)
+def touch_poll_for_question(sender, instance, **kwargs):
+    # A question changed, so the poll's definition and search document changed too
+    if _cascading_from_poll(kwargs):
+        return
+    Polls.objects.filter(pk=instance.poll_id_id).refresh_search_vector(last_modified=timezone.now())
+
+
+# Questions with ranked ballots among a queryset's options, looked up once per
+# bulk delete rather than once per option row
+_locked_questions = WeakKeyDictionary()
+
+
+def locked_question_ids(options):
+    if options not in _locked_questions:
+        _locked_questions[options] = set(
+            Questions.objects.filter(question_type=Questions.RANKED, ranked_ballots__isnull=False, options__in=options)
+            .values_list('pk', flat=True)
+        )
+    return _locked_questions[options]
+
+
+@receiver([pre_save, pre_delete], sender=Options)
+def keep_ranked_options(sender, instance, **kwargs):
+    # Backstop for `Options.clean`: stored rankings would point at the wrong
+    # options. Only direct edits are blocked; a cascade removes the whole
+    # question with its ballots, or is started by removing a voter or owner.
+    if kwargs.get('signal') is pre_save:
+        if instance._state.adding and instance.question_id.options_locked():
+            raise ValidationError("Options of a ranked question can't change once it has ballots.")
+        return
+    origin = kwargs.get('origin')
+    if isinstance(origin, Options):
+        locked = origin.question_id.options_locked()
+    elif getattr(origin, 'model', None) is Options:
+        locked = instance.question_id_id in locked_question_ids(origin)
+    else:
+        return
+    if locked:
+        raise ValidationError("Options of a ranked question can't change once it has ballots.")
+
+
+@receiver([post_save, post_delete], sender=Options)
+def touch_poll_for_option(sender, instance, **kwargs):
+    if _cascading_from_poll(kwargs):
+        return
+    Polls.objects.filter(questions=instance.question_id_id).update(last_modified=timezone.now())
+
+
+@receiver(post_save, sender=Polls)
+def index_poll_for_search(sender, instance, update_fields=None, **kwargs):
+    # Only title and description feed the search document from the poll itself
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    Polls.objects.filter(pk=instance.pk).refresh_search_vector()
+
+
+@receiver([post_save, post_delete], sender=Polls)
+def forget_poll_visibility(sender, instance, **kwargs):
+    # Ownership, privacy or state may have changed
+    invalidate_poll_visibility(instance.pk)
+
+
+@receiver(poll_closed)
+def forget_closed_poll_visibility(sender, poll_ids, **kwargs):
+    # The expiry scheduler closes polls with a bulk UPDATE, which sends no post_save
+    invalidate_poll_visibility(*poll_ids)
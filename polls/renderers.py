@@ -0,0 +1,41 @@
+import uuid
+import msgpack
+from datetime import date, datetime, time
+from decimal import Decimal
+from rest_framework.renderers import BaseRenderer
+
+
+def _encode(obj):
+    # Fallback for values msgpack can't pack natively.
+    # Mirrors what DRF's JSON encoder emits so both formats carry the same data.
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, datetime):
+        value = obj.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders responses as MessagePack for high-volume clients (kiosks, mobile).
+    Selected with `Accept: application/msgpack` or `?format=msgpack`;
+    JSON stays the default for everyone else.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encode, use_bin_type=True)
@@ -1,5 +1,10 @@
 from rest_framework import serializers
-from .models import Polls, Questions, Options, Votes
+from django.db import IntegrityError, connection, transaction
+from .models import Polls, Questions, Options, Votes, RankedBallot, PollTemplate, ArchivedPoll, OutboxEvent
+from .guests import get_guest
+from .ranked import count_ballot
+from .trending import record_activity
+from functools import partial
 import uuid
 from datetime import datetime, timezone
 
@@ -45,16 +50,44 @@ class QuestionsSerializer(serializers.ModelSerializer):
         poll_id = self.context['view'].kwargs.get('poll_pk')
 
         try:
-            poll = Polls.objects.get(pk=poll_id)
+            poll = Polls.objects.live().get(pk=poll_id)
         except Polls.DoesNotExist:
             raise serializers.ValidationError("Invalid poll ID")
 
         question = Questions.objects.create(poll_id=poll, **validated_data)
-        # creates option nested in the options list
-        for option_data in options_data:
-            Options.objects.create(question_id=question, **option_data)
+        # creates option nested in the options list in one INSERT
+        # (saving the question has already bumped the poll's last_modified)
+        Options.objects.bulk_create(
+            [Options(question_id=question, **option_data) for option_data in options_data]
+        )
         return question
 
+def voter_fields(request):
+    # Vote owner fields: the guest ID for guest voters, otherwise the user
+    guest = get_guest(request)
+    if guest:
+        return {'guest_id': guest.guest_id}
+    return {'user_id': request.user}
+
+def lock_voter(question, voter):
+    # Serializes one voter's concurrent votes on a question until the
+    # transaction ends; other voters are not blocked. The question itself is
+    # only locked shared, so a ballot import can hold off all of its voters
+    # while it merges (see `polls.ballot_import`).
+    owner = voter['guest_id'] if 'guest_id' in voter else voter['user_id'].pk
+    key = f"{question.pk}:{owner}"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock_shared(hashtextextended(%s, 0)), pg_advisory_xact_lock(hashtextextended(%s, 0))",
+            [str(question.pk), key],
+        )
+
+def check_poll_open(poll):
+    # Blocks voting on closed or expired polls.
+    has_expired = poll.expires_at is not None and datetime.now(timezone.utc) > poll.expires_at
+    if poll.is_closed or has_expired:
+        raise serializers.ValidationError("Voting is closed or expired for this poll.")
+
 class VotesSerializer(serializers.ModelSerializer):
     """
     Handles validation and creation of votes,
@@ -62,8 +95,8 @@ class VotesSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Votes
-        fields = ['vote_id', 'option_id', 'user_id', 'created_at']
-        read_only_fields = ['vote_id', 'created_at', 'user_id']
+        fields = ['vote_id', 'option_id', 'user_id', 'guest_id', 'created_at']
+        read_only_fields = ['vote_id', 'created_at', 'user_id', 'guest_id']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -80,35 +113,130 @@ class VotesSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("This option doesn't belong to the question.")
         return option
 
+    def voter(self):
+        return voter_fields(self.context['request'])
+
     def validate(self, attrs):
         # Prevents multiple votes on single-choice questions and 
         # blocks voting on closed or expired polls.
-        user = self.context['request'].user
         option = attrs['option_id']
         question = option.question_id
         poll = question.poll_id
 
+        # Ranked questions take a ballot, not a single option
+        if question.question_type == Questions.RANKED:
+            raise serializers.ValidationError("This question takes a ranked ballot; send `ranking` instead.")
+
         # Check if user already voted (single choice)
         if question.question_type == Questions.SINGLE:
-            if Votes.objects.filter(user_id=user, option_id__question_id=question).exists():
+            if Votes.objects.filter(option_id__question_id=question, **self.voter()).exists():
                 raise serializers.ValidationError("You have already voted on this question.")
             
         
-        has_expired = poll.expires_at is not None and datetime.now(timezone.utc) > poll.expires_at
         # Check if poll is active
-        if poll.is_closed or has_expired :
-            raise serializers.ValidationError("Voting is closed or expired for this poll.")
+        check_poll_open(poll)
 
         return attrs
     
     def create(self, validated_data):
-        # Creates and saves a vote with a unique ID and the authenticated user.
-        return Votes.objects.create(
-            vote_id=uuid.uuid4(),
-            option_id=validated_data['option_id'],
-            user_id=self.context['request'].user
-        )
+        # Creates and saves a vote with a unique ID for the authenticated user or guest,
+        # and its outbox event in the same transaction. The poll's trending
+        # score is bumped once the vote has committed.
+        # The database is the guard against concurrent duplicates: a unique
+        # constraint per voter and option, and for single-choice questions a
+        # per-voter lock under which the check in `validate` is repeated.
+        question = self.context['question']
+        voter = self.voter()
+        try:
+            with transaction.atomic():
+                if question.question_type == Questions.SINGLE:
+                    lock_voter(question, voter)
+                    if Votes.objects.filter(option_id__question_id=question, **voter).exists():
+                        raise serializers.ValidationError("You have already voted on this question.")
+                vote = Votes.objects.create(
+                    vote_id=uuid.uuid4(),
+                    option_id=validated_data['option_id'],
+                    **voter
+                )
+                OutboxEvent.for_vote(vote, question.poll_id_id).save()
+                transaction.on_commit(partial(record_activity, question.poll_id_id, vote.created_at))
+        except IntegrityError:
+            # A concurrent request from the same voter got there first
+            raise serializers.ValidationError("You have already voted for this option.")
+        return vote
     
+class RankedBallotSerializer(serializers.Serializer):
+    """
+    Validates and records a ballot on a ranked-choice question.
+    `ranking` lists the question's option IDs in preference order;
+    options left out are simply not ranked.
+    """
+    ranking = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+
+    def validate_ranking(self, ranking):
+        # Converts option IDs to the indexes stored on the ballot
+        question = self.context['question']
+        self.option_ids = list(question.options.order_by('option_id').values_list('option_id', flat=True))
+        index_of = {option_id: index for index, option_id in enumerate(self.option_ids)}
+        if len(set(ranking)) != len(ranking):
+            raise serializers.ValidationError("An option can only be ranked once.")
+        if any(option_id not in index_of for option_id in ranking):
+            raise serializers.ValidationError("This option doesn't belong to the question.")
+        return [index_of[option_id] for option_id in ranking]
+
+    def validate(self, attrs):
+        question = self.context['question']
+        if RankedBallot.objects.filter(question_id=question, **voter_fields(self.context['request'])).exists():
+            raise serializers.ValidationError("You have already voted on this question.")
+        check_poll_open(question.poll_id)
+        return attrs
+
+    def create(self, validated_data):
+        # Stores the ballot, bumps its ranking's pattern count and writes
+        # its outbox event in one transaction, then bumps the poll's trending score.
+        question = self.context['question']
+        try:
+            with transaction.atomic():
+                ballot = RankedBallot.objects.create(
+                    question_id=question,
+                    ranking=validated_data['ranking'],
+                    **voter_fields(self.context['request'])
+                )
+                count_ballot(question.pk, ballot.ranking)
+                ranking_option_ids = [self.option_ids[index] for index in ballot.ranking]
+                OutboxEvent.for_ballot(ballot, question.poll_id_id, ranking_option_ids).save()
+                transaction.on_commit(partial(record_activity, question.poll_id_id, ballot.created_at))
+        except IntegrityError:
+            # A concurrent request from the same voter got there first
+            raise serializers.ValidationError("You have already voted on this question.")
+        return ballot
+
+class ClonePollSerializer(serializers.Serializer):
+    """
+    Options for cloning a poll or instantiating a template.
+    """
+    title = serializers.CharField(max_length=255, required=False)
+    include_votes = serializers.BooleanField(default=False)
+
+class PollTemplateSerializer(serializers.ModelSerializer):
+    """
+    Serializes saved poll templates. The definition is captured
+    from an existing poll, so it is read-only here.
+    """
+    class Meta:
+        model = PollTemplate
+        fields = ['template_id', 'name', 'created_by', 'definition', 'created_at']
+        read_only_fields = ['template_id', 'created_by', 'definition', 'created_at']
+
+class ArchivedPollSerializer(serializers.ModelSerializer):
+    """
+    Read-only view of an archived poll and its frozen results.
+    """
+    class Meta:
+        model = ArchivedPoll
+        fields = ['poll_id', 'title', 'description', 'created_by', 'created_at', 'expires_at', 'is_public', 'archived_at', 'results']
+        read_only_fields = fields
+
 class ClosePollSerializer(serializers.Serializer):
     """
     Empty serializer for closing a poll.
@@ -116,3 +244,88 @@ class ClosePollSerializer(serializers.Serializer):
     """
     pass
 
+
+def _uuid_str(value):
+    return None if value is None else str(value)
+
+_datetime_field = serializers.DateTimeField()
+
+class ReadSerializer:
+    """
+    Base for the lightweight, read-only serializers used by list/retrieve.
+    Builds plain dicts from `.values()` rows with the same output as the
+    matching ModelSerializer, without DRF's per-field binding and validation.
+    Writes still go through the full ModelSerializers above.
+    """
+    fields = ()
+    # Field name -> callable applied to the raw column value
+    converters = {}
+    # Entries of `fields` that are queryset annotations rather than model fields
+    annotations = ()
+
+    def __init__(self):
+        # Precompile the per-field plan once instead of on every row
+        self.plan = tuple((name, self.converters.get(name)) for name in self.fields)
+
+    def to_representation(self, row):
+        return {
+            name: row[name] if convert is None else convert(row[name])
+            for name, convert in self.plan
+        }
+
+    def many(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+    def row_from_instance(self, instance, fields=None):
+        # Mirrors `.values()` for a single loaded instance (FKs give their raw id)
+        opts = instance._meta
+        return {
+            name: getattr(instance, name if name in self.annotations else opts.get_field(name).attname)
+            for name in (fields or self.fields)
+        }
+
+class PollsReadSerializer(ReadSerializer):
+    """
+    Read-only counterpart of `PollsSerializer`.
+    """
+    fields = tuple(PollsSerializer.Meta.fields)
+    converters = {
+        'poll_id': _uuid_str,
+        'created_by': _uuid_str,
+        'expires_at': _datetime_field.to_representation,
+        'created_at': _datetime_field.to_representation,
+    }
+
+class QuestionsReadSerializer(ReadSerializer):
+    """
+    Read-only counterpart of `QuestionsSerializer`.
+    Options are attached from one grouped query for the whole page of questions.
+    `my_vote` comes from the `voted_annotation` the viewset adds to its queryset.
+    """
+    fields = tuple(f for f in QuestionsSerializer.Meta.fields if f != 'options') + ('my_vote',)
+    annotations = ('my_vote',)
+    option_fields = tuple(OptionSerializer.Meta.fields)
+    converters = {
+        'question_id': _uuid_str,
+        'poll_id': _uuid_str,
+    }
+
+    def many(self, rows):
+        questions = [self.to_representation(row) for row in rows]
+        if not questions:
+            return questions
+
+        # One query for every option on the page, in the nested serializer's ordering
+        by_question = {q['question_id']: q for q in questions}
+        option_rows = Options.objects.filter(
+            question_id__in=list(by_question)
+        ).values('question_id', *self.option_fields)
+
+        for q in questions:
+            q['options'] = []
+        for row in option_rows:
+            by_question[str(row['question_id'])]['options'].append({
+                'option_id': str(row['option_id']),
+                'option_text': row['option_text'],
+            })
+        return questions
@@ -1,18 +1,36 @@
-from polls.models import Options, Questions
-from .serializers import VotesSerializer
-from rest_framework.exceptions import PermissionDenied
-from django.db.models import Count, Prefetch
+from polls.models import (
+    Options, Questions, Polls, PollTemplate, Votes, RankedBallot, RankedBallotPattern, ArchivedPoll, OutboxEvent,
+    SEARCH_CONFIG,
+)
+from .ranked import ranked_tallies
+from .serializers import VotesSerializer, RankedBallotSerializer
+from .signals import poll_closed
+from .trending import activity, min_score
+from .visibility import invalidate_poll_visibility
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import BooleanField, Count, Exists, ExpressionWrapper, F, FloatField, Max, OuterRef, Q, Value
+from django.db.models.functions import Cast
+from django.utils import timezone
+from datetime import datetime, timedelta
+import base64
+import json
+import uuid
 
 def handle_vote(request, question):
     """
     Handles the logic for casting a vote on a given question.
 
-    - Validates the incoming vote data using `VotesSerializer`
-    - Associates the vote with the currently authenticated user
+    - Validates the incoming vote data using `VotesSerializer`, or
+      `RankedBallotSerializer` for ranked-choice questions
+    - Associates the vote with the authenticated user, or the guest voter
+      identified by a signed guest token
     - Saves the vote to the database
     - Returns the serialized vote data
     """
-    serializer = VotesSerializer(
+    serializer_class = RankedBallotSerializer if question.question_type == Questions.RANKED else VotesSerializer
+    serializer = serializer_class(
         data=request.data,
         context={
             "request": request,
@@ -21,7 +39,7 @@ def handle_vote(request, question):
     )
 
     serializer.is_valid(raise_exception=True)
-    serializer.save(user_id=request.user)
+    serializer.save()
 
     return serializer
 
@@ -42,50 +60,634 @@ def close_poll(poll, user):
     poll.close()
     return "Poll closed successfully."
 
+def close_expired_polls(batch_size=500, now=None):
+    """
+    Closes every open poll whose `expires_at` has passed.
+
+    - Works in batches so a backlog of due polls never holds one long lock
+    - Each batch locks its rows with `SKIP LOCKED`, so concurrent schedulers
+      split the work instead of blocking on each other
+    - Closes the whole batch with a single UPDATE, and writes its
+      `poll.closed` outbox events in the same transaction
+    - Fires `poll_closed` once per batch with the closed poll IDs
+    - Returns the total number of polls closed
+    """
+    now = now or timezone.now()
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            poll_ids = list(
+                Polls.objects.due(now)
+                .select_for_update(skip_locked=True)
+                .order_by()
+                .values_list('poll_id', flat=True)[:batch_size]
+            )
+            if not poll_ids:
+                break
+            Polls.objects.filter(pk__in=poll_ids).update(is_closed=True, last_modified=now)
+            OutboxEvent.objects.bulk_create([OutboxEvent.for_poll_closed(poll_id, now) for poll_id in poll_ids])
+
+        poll_closed.send(sender=Polls, poll_ids=poll_ids)
+        total += len(poll_ids)
+
+        if len(poll_ids) < batch_size:
+            break
+
+    return total
+
+def soft_delete_poll(poll):
+    """
+    Hides a poll immediately and queues it for the background purge.
+    The poll disappears from every listing, detail, vote and results endpoint.
+    """
+    poll.deleted_at = timezone.now()
+    poll.save(update_fields=['deleted_at', 'last_modified'])
+
+def purge_deleted_polls(batch_size=5000, limit=None):
+    """
+    Permanently deletes soft-deleted and archived polls from the hot tables
+    without loading their votes.
+
+    - Deletes each poll's votes and ranked ballots in chunks of `batch_size`,
+      each chunk being one `DELETE ... WHERE ... IN (...)` on a short transaction
+    - Then deletes the poll itself; only its questions and options are
+      collected in memory, which is bounded by the poll's structure, not its traffic
+    - Processes at most `limit` polls per call (all of them by default)
+    - Returns the number of polls purged
+    """
+    purged = 0
+    # Two queries so each can use its partial index
+    poll_ids = []
+    for flag in ('deleted_at', 'archived_at'):
+        pending = Polls.objects.filter(**{f'{flag}__isnull': False}).order_by(flag).values_list('poll_id', flat=True)
+        poll_ids.extend(pending[:limit] if limit else pending)
+    if limit:
+        poll_ids = poll_ids[:limit]
+
+    for poll_id in poll_ids:
+        votes = Votes.objects.filter(option_id__question_id__poll_id=poll_id)
+        while True:
+            vote_ids = list(votes.order_by().values_list('vote_id', flat=True)[:batch_size])
+            if not vote_ids:
+                break
+            Votes.objects.filter(pk__in=vote_ids).delete()
+
+        ballots = RankedBallot.objects.filter(question_id__poll_id=poll_id)
+        while True:
+            ballot_ids = list(ballots.order_by().values_list('ballot_id', flat=True)[:batch_size])
+            if not ballot_ids:
+                break
+            RankedBallot.objects.filter(pk__in=ballot_ids).delete()
+
+        Polls.objects.filter(pk=poll_id).delete()
+        purged += 1
+
+    return purged
+
 def handle_result(poll):
     """
     Generates a structured result summary for a poll.
     
-    - Prefetches all questions and their related options and votes using optimized queries
-    - Annotates each option with its total vote count
+    - Counts votes with the grouped queries of `tally_polls`
+      (see `handle_results`); no vote row is loaded
     - Builds a response containing:
         - Each question's details
         - Total votes per question
         - All options with their vote counts and percentages
     - Returns the full result as a nested dictionary
     """
-    results = {
-        "poll_id": poll.poll_id,
-        "poll_title": poll.title,
-        "questions": []
+    return handle_results([{'poll_id': poll.poll_id, 'title': poll.title}])[str(poll.poll_id)]
+
+def handle_results(polls):
+    """
+    Generates `handle_result` summaries for many polls at once.
+
+    - `polls` are dicts with the `poll_id` and `title` of polls the
+      caller is allowed to see
+    - Uses the same fixed number of grouped queries however many polls
+      are asked for (see `tally_polls`)
+    - Returns a dict of poll ID (as a string) -> result summary
+    """
+    # IDs are stringified once here so renderers don't fall back
+    # to their per-value encoder hook for every UUID in the tree
+    tallies = tally_polls([poll['poll_id'] for poll in polls])
+    return {
+        str(poll['poll_id']): {
+            "poll_id": str(poll['poll_id']),
+            "poll_title": poll['title'],
+            "questions": tallies[poll['poll_id']],
+        }
+        for poll in polls
     }
 
-    # Prefetch votes for each option
-    option_qs = Options.objects.annotate(vote_count=Count('votes')).prefetch_related('votes')
-    # Prefetch options for each question (and their votes)
-    question_qs = Questions.objects.filter(poll_id=poll).order_by('-created_at').prefetch_related(
-        Prefetch('options', queryset=option_qs, to_attr='prefetched_options')
+def add_ranked_results(questions):
+    """
+    Fills in instant-runoff results for ranked-choice questions.
+
+    - `questions` maps question IDs to their result dicts, whose options
+      must be in ballot order (by `option_id`)
+    - Options get their first-preference counts and percentages
+    - Adds "rounds" (per-round tallies, exhausted ballots and eliminated
+      options) and the "winner" option ID, or None on a tie or no ballots
+    """
+    if not questions:
+        return
+    tallies = ranked_tallies({question_id: len(result['options']) for question_id, result in questions.items()})
+
+    for question_id, result in questions.items():
+        ballots, winner, rounds = tallies[question_id]
+        option_ids = [option['option_id'] for option in result['options']]
+        first_round = rounds[0]['tallies'] if rounds else {}
+
+        result['total_votes'] = ballots
+        for index, option in enumerate(result['options']):
+            option['vote_count'] = first_round.get(index, 0)
+            option['percentage'] = round((option['vote_count'] / ballots) * 100, 2) if ballots > 0 else 0
+        result['rounds'] = [
+            {
+                "tallies": {option_ids[index]: count for index, count in sorted(round_result['tallies'].items())},
+                "exhausted": round_result['exhausted'],
+                "eliminated": [option_ids[index] for index in round_result['eliminated']],
+            }
+            for round_result in rounds
+        ]
+        result['winner'] = option_ids[winner] if winner is not None else None
+
+def tally_polls(poll_ids):
+    """
+    Computes the results "questions" list for many polls at once.
+
+    - One query for the questions of every poll, one grouped COUNT for
+      every option and one read of the ranked ballot patterns, regardless
+      of how many polls are asked for
+    - Shape of the results "questions" list: questions newest first,
+      options in `option_id` order
+    - Returns a dict of poll ID -> questions list
+    """
+    tallies = {poll_id: [] for poll_id in poll_ids}
+    questions = {}
+    ranked = {}
+
+    question_rows = (
+        Questions.objects.filter(poll_id__in=poll_ids)
+        .order_by('-created_at')
+        .values('question_id', 'poll_id', 'question_text', 'question_type')
     )
-    
-    for question in question_qs:
-        options = question.prefetched_options
-        total_votes = sum(opt.vote_count for opt in options)
-        question_result = {
-            "question_id": question.question_id,
-            "question_text": question.question_text,
-            "total_votes": total_votes,
-            "options": [
-                {
-                    "option_id": str(opt.option_id),
-                    "option_text": opt.option_text,
-                    "vote_count": opt.vote_count,
-                    "percentage": round((opt.vote_count / total_votes) * 100, 2) if total_votes > 0 else 0
-                }
-                for opt in options
-            ]
+    for row in question_rows:
+        question = {
+            "question_id": str(row['question_id']),
+            "question_text": row['question_text'],
+            "total_votes": 0,
+            "options": [],
         }
+        questions[row['question_id']] = question
+        tallies[row['poll_id']].append(question)
+        if row['question_type'] == Questions.RANKED:
+            ranked[row['question_id']] = question
+
+    option_rows = (
+        Options.objects.filter(question_id__poll_id__in=poll_ids)
+        .values('option_id', 'question_id', 'option_text')
+        .annotate(vote_count=Count('votes'))
+        .order_by('question_id', 'option_id')
+    )
+    for row in option_rows:
+        question = questions[row['question_id']]
+        question['total_votes'] += row['vote_count']
+        question['options'].append({
+            "option_id": str(row['option_id']),
+            "option_text": row['option_text'],
+            "vote_count": row['vote_count'],
+        })
+
+    for question in questions.values():
+        total_votes = question['total_votes']
+        for option in question['options']:
+            option['percentage'] = round((option['vote_count'] / total_votes) * 100, 2) if total_votes > 0 else 0
+
+    add_ranked_results(ranked)
+    return tallies
+
+def archive_polls(older_than_days, batch_size=200, now=None):
+    """
+    Moves closed polls that haven't changed in `older_than_days` to the archive.
+
+    - Works in batches; each batch locks its polls with `SKIP LOCKED`
+    - Snapshots the batch's questions, options and final tallies with the
+      grouped queries of `tally_polls`
+    - Writes one `ArchivedPoll` per poll with a single `bulk_create`
+    - Flags the hot polls with `archived_at`, which hides them at once and
+      hands their rows to `purge_deleted_polls`
+    - Returns the number of polls archived
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=older_than_days)
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            polls = list(
+                Polls.objects.live()
+                .filter(is_closed=True, last_modified__lt=cutoff)
+                .select_for_update(skip_locked=True)
+                .order_by()
+                .values('poll_id', 'title', 'description', 'created_by', 'created_at', 'expires_at', 'is_public')[:batch_size]
+            )
+            if not polls:
+                break
+
+            poll_ids = [poll['poll_id'] for poll in polls]
+            tallies = tally_polls(poll_ids)
+            ArchivedPoll.objects.bulk_create([
+                ArchivedPoll(
+                    poll_id=poll['poll_id'],
+                    title=poll['title'],
+                    description=poll['description'],
+                    created_by_id=poll['created_by'],
+                    created_at=poll['created_at'],
+                    expires_at=poll['expires_at'],
+                    is_public=poll['is_public'],
+                    results=tallies[poll['poll_id']],
+                )
+                for poll in polls
+            ])
+            Polls.objects.filter(pk__in=poll_ids).update(archived_at=now)
+
+        invalidate_poll_visibility(*poll_ids)
+        total += len(poll_ids)
+        if len(poll_ids) < batch_size:
+            break
+
+    return total
+
+def poll_definition(poll):
+    """
+    Snapshots a poll's structure as a plain dict (see `PollTemplate.definition`).
+
+    - Reads the questions and all their options with two queries
+    - Keeps questions in creation order
+    - Returns the definition plus the source option IDs, in the same
+      order as the options appear in the definition
+    """
+    questions = list(
+        Questions.objects.filter(poll_id=poll)
+        .order_by('created_at', 'question_id')
+        .values('question_id', 'question_text', 'question_type')
+    )
+    options_by_question = {}
+    for row in Options.objects.filter(question_id__poll_id=poll).values('option_id', 'question_id', 'option_text'):
+        options_by_question.setdefault(row['question_id'], []).append(row)
+
+    definition = {
+        'title': poll.title,
+        'description': poll.description,
+        'is_public': poll.is_public,
+        'questions': [],
+    }
+    source_option_ids = []
+    for question in questions:
+        options = options_by_question.get(question['question_id'], [])
+        definition['questions'].append({
+            'question_text': question['question_text'],
+            'question_type': question['question_type'],
+            'options': [{'option_text': row['option_text']} for row in options],
+        })
+        source_option_ids.extend(row['option_id'] for row in options)
+    return definition, source_option_ids
+
+def build_poll(definition, user, title=None):
+    """
+    Creates a new poll owned by `user` from a poll definition.
+
+    - One INSERT for the poll, one `bulk_create` for all questions
+      and one for all options, whatever the poll's size
+    - IDs are generated fresh
+    - Returns the new poll and its options in definition order
+    """
+    poll = Polls.objects.create(
+        title=title or definition['title'],
+        description=definition.get('description', ''),
+        is_public=definition.get('is_public', True),
+        created_by=user,
+    )
 
-        results['questions'].append(question_result)
+    questions, options = [], []
+    for question_data in definition['questions']:
+        question = Questions(
+            poll_id=poll,
+            question_text=question_data['question_text'],
+            question_type=question_data.get('question_type', Questions.SINGLE),
+        )
+        questions.append(question)
+        options.extend(
+            Options(question_id=question, option_text=option_data['option_text'])
+            for option_data in question_data['options']
+        )
 
-    return results
+    Questions.objects.bulk_create(questions)
+    Options.objects.bulk_create(options)
+    # bulk_create sends no signals, so index the question texts here
+    Polls.objects.filter(pk=poll.pk).refresh_search_vector()
+    return poll, options
 
+@transaction.atomic
+def clone_poll(poll, user, include_votes=False, title=None):
+    """
+    Copies a poll with all its questions and options into a new open poll.
+
+    - Runs in one transaction
+    - Uses a fixed number of statements for the structure (see `build_poll`)
+    - Leaves votes behind unless `include_votes` is set, which only the
+      poll owner may do; votes and ranked ballots are then copied in chunks,
+      each chunk with its outbox events
+    - Returns the new poll
+    """
+    if include_votes and poll.created_by_id != user.pk:
+        raise PermissionDenied("Only the poll owner can copy its votes.")
+
+    definition, source_option_ids = poll_definition(poll)
+    new_poll, new_options = build_poll(definition, user, title=title)
+
+    if include_votes:
+        option_map = dict(zip(source_option_ids, new_options))
+
+        def insert_votes(batch):
+            Votes.objects.bulk_create(batch)
+            OutboxEvent.objects.bulk_create([OutboxEvent.for_vote(vote, new_poll.pk) for vote in batch])
+
+        votes = Votes.objects.filter(option_id__in=source_option_ids).values_list('option_id', 'user_id', 'guest_id')
+        batch = []
+        for option_id, user_id, guest_id in votes.iterator(chunk_size=5000):
+            batch.append(Votes(option_id=option_map[option_id], user_id_id=user_id, guest_id=guest_id))
+            if len(batch) >= 5000:
+                insert_votes(batch)
+                batch = []
+        insert_votes(batch)
+        copy_ranked_ballots(poll, option_map)
+
+    return new_poll
+
+def copy_ranked_ballots(poll, new_option_for):
+    """
+    Copies a poll's ranked ballots and their pattern counts onto a clone.
+
+    - `new_option_for` maps each source option ID to its new `Options` object
+    - Ballots index options by `option_id` order, which differs between
+      the two polls, so every ranking is translated to the new indexes
+    - Patterns are copied as they are, so the clone's results need no recount;
+      ballots are copied in chunks, each with its outbox events
+    """
+    old_option_ids = {}
+    rows = (
+        Options.objects.filter(question_id__poll_id=poll, question_id__question_type=Questions.RANKED)
+        .order_by('question_id', 'option_id')
+        .values_list('question_id', 'option_id')
+    )
+    for question_id, option_id in rows:
+        old_option_ids.setdefault(question_id, []).append(option_id)
+
+    new_question_for, new_index_for, new_order_for = {}, {}, {}
+    for question_id, option_ids in old_option_ids.items():
+        new_options = [new_option_for[option_id] for option_id in option_ids]
+        new_order = sorted(option.option_id for option in new_options)
+        new_question_for[question_id] = new_options[0].question_id
+        new_index_for[question_id] = [new_order.index(option.option_id) for option in new_options]
+        new_order_for[new_options[0].question_id.pk] = new_order
+
+    def translate(question_id, ranking):
+        return [new_index_for[question_id][index] for index in ranking]
+
+    patterns = RankedBallotPattern.objects.filter(question_id__in=list(old_option_ids)).values_list('question_id', 'ranking', 'ballot_count')
+    RankedBallotPattern.objects.bulk_create([
+        RankedBallotPattern(question_id=new_question_for[question_id], ranking=translate(question_id, ranking), ballot_count=ballot_count)
+        for question_id, ranking, ballot_count in patterns
+    ])
+
+    def insert_ballots(batch):
+        RankedBallot.objects.bulk_create(batch)
+        OutboxEvent.objects.bulk_create([
+            OutboxEvent.for_ballot(
+                ballot, ballot.question_id.poll_id_id,
+                [new_order_for[ballot.question_id_id][index] for index in ballot.ranking],
+            )
+            for ballot in batch
+        ])
+
+    ballots = RankedBallot.objects.filter(question_id__in=list(old_option_ids)).values_list('question_id', 'user_id', 'guest_id', 'ranking')
+    batch = []
+    for question_id, user_id, guest_id, ranking in ballots.iterator(chunk_size=5000):
+        batch.append(RankedBallot(
+            question_id=new_question_for[question_id], user_id_id=user_id, guest_id=guest_id,
+            ranking=translate(question_id, ranking),
+        ))
+        if len(batch) >= 5000:
+            insert_ballots(batch)
+            batch = []
+    insert_ballots(batch)
+
+def save_poll_template(poll, user, name=None):
+    """
+    Saves a poll's structure as a reusable template owned by `user`.
+    """
+    if poll.created_by_id != user.pk:
+        raise PermissionDenied("Only the poll owner can save it as a template.")
+    definition, _ = poll_definition(poll)
+    return PollTemplate.objects.create(name=name or poll.title, created_by=user, definition=definition)
+
+@transaction.atomic
+def instantiate_template(template, user, title=None):
+    """
+    Creates a new poll from a saved template, without touching the source poll.
+    """
+    poll, _ = build_poll(template.definition, user, title=title)
+    return poll
+
+def _encode_cursor(**values):
+    payload = json.dumps(values, default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_cursor(cursor, **converters):
+    # Returns the cursor's values converted in the order of `converters`.
+    # Converters raise ValueError (or TypeError/AttributeError on a value of
+    # the wrong JSON type) for anything a client could have tampered with.
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return tuple(convert(payload[key]) for key, convert in converters.items())
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise ValidationError({'cursor': "Invalid cursor."})
+
+SEARCH_MODES = ('fts', 'trgm')
+
+def _search_mode(value):
+    if value not in SEARCH_MODES:
+        raise ValueError(value)
+    return value
+
+def clamp_page_size(value, default=20, maximum=100):
+    # Page size from a query parameter, kept within 1..maximum
+    try:
+        return min(max(int(value), 1), maximum)
+    except (TypeError, ValueError):
+        return default
+
+def search_polls(queryset, text, fields, cursor=None, page_size=20):
+    """
+    Ranked full-text search over poll titles, descriptions and question texts.
+
+    - Matches `search_vector` (GIN-indexed) with a websearch query, ranked by `ts_rank`
+    - If nothing matches, falls back to trigram/prefix matching on the title
+      (GIN trigram index), ranked by word similarity
+    - Keyset pagination on (rank, poll_id): each page is one indexed query,
+      however deep the client pages. Ranks are `real` in Postgres; they are cast
+      to double precision so the cursor value round-trips exactly
+    - `queryset` carries the caller's visibility rules
+    - Returns the page as `.values(*fields)` rows and the next cursor (or None)
+    """
+    mode, after_rank, after_id = _decode_cursor(cursor, m=_search_mode, r=float, id=uuid.UUID) if cursor else (None, None, None)
+
+    if mode in (None, 'fts'):
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        matches = queryset.filter(search_vector=query).annotate(rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+        if mode is None and not matches.exists():
+            mode = 'trgm'
+        else:
+            mode = 'fts'
+
+    if mode == 'trgm':
+        matches = queryset.filter(
+            Q(title__istartswith=text) | Q(title__trigram_word_similar=text)
+        ).annotate(rank=Cast(TrigramWordSimilarity(text, 'title'), FloatField()))
+
+    if after_id is not None:
+        matches = matches.filter(Q(rank__lt=after_rank) | Q(rank=after_rank, poll_id__gt=after_id))
+
+    rows = list(matches.order_by('-rank', 'poll_id').values(*fields, 'rank')[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = _encode_cursor(m=mode, r=rows[-1]['rank'], id=rows[-1]['poll_id'])
+    return rows, next_cursor
+
+def trending_polls(queryset, fields, cursor=None, page_size=20):
+    """
+    Polls ranked by decayed voting activity, most active first.
+
+    - Reads the `PollTrend` leaderboard in index order; each page is one
+      query however many polls or votes there are
+    - Polls whose activity has decayed below `MIN_ACTIVITY` are left out
+    - Keyset pagination on (score, poll_id), like `search_polls`
+    - `queryset` carries the caller's visibility rules
+    - Returns the page as `.values(*fields)` rows, each with its current
+      `activity` (decayed vote count), and the next cursor (or None)
+    """
+    now = timezone.now()
+    ranked = queryset.filter(trend__score__gte=min_score(now)).annotate(score=F('trend__score'))
+    if cursor:
+        after_score, after_id = _decode_cursor(cursor, s=float, id=uuid.UUID)
+        ranked = ranked.filter(Q(score__lt=after_score) | Q(score=after_score, poll_id__gt=after_id))
+
+    rows = list(ranked.order_by('-score', 'poll_id').values(*fields, 'score')[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = _encode_cursor(s=rows[-1]['score'], id=rows[-1]['poll_id'])
+    for row in rows:
+        row['activity'] = round(activity(row['score'], now), 2)
+    return rows, next_cursor
+
+def voted_annotation(user, scope='question'):
+    """
+    Expression for a `my_vote` annotation: whether `user` has voted on the
+    outer question (`scope='question'`) or on any question of the outer poll
+    (`scope='poll'`).
+
+    - Two correlated EXISTS (votes and ranked ballots) evaluated inside the
+      listing's own query, so a page costs no extra queries
+    - Always false for anonymous users; guest votes are not looked up
+    """
+    if not user.is_authenticated:
+        return Value(False)
+    question = 'question_id' if scope == 'question' else 'question_id__poll_id'
+    votes = Votes.objects.filter(user_id=user, **{f'option_id__{question}': OuterRef('pk')})
+    ballots = RankedBallot.objects.filter(user_id=user, **{question: OuterRef('pk')})
+    return ExpressionWrapper(Q(Exists(votes)) | Q(Exists(ballots)), output_field=BooleanField())
+
+def latest_vote_at(user):
+    """
+    When `user` last voted or cast a ranked ballot, or None.
+    Responses carrying `my_vote` use it as a validator. Both lookups are
+    backward scans of the (user_id, created_at) indexes.
+    """
+    if not user.is_authenticated:
+        return None
+    times = [
+        model.objects.filter(user_id=user).order_by().aggregate(latest=Max('created_at'))['latest']
+        for model in (Votes, RankedBallot)
+    ]
+    return max(filter(None, times), default=None)
+
+def vote_history(user, cursor=None, page_size=20):
+    """
+    A user's votes and ranked ballots, newest first, one row per vote.
+
+    - Hides polls that were deleted or archived
+    - Keyset pagination on (created_at, id): each page reads at most
+      `page_size + 1` rows from each table, in order, from the
+      (user_id, created_at) indexes, and merges them
+    - Ranked ballots list their option ids in preference order
+    - Returns the rows and the next cursor (or None)
+    """
+    after = _decode_cursor(cursor, t=datetime.fromisoformat, id=uuid.UUID) if cursor else None
+
+    def newest(queryset, pk, question, *fields):
+        # The first rows of one table after the cursor
+        queryset = queryset.filter(**{
+            'user_id': user,
+            f'{question}__poll_id__deleted_at__isnull': True,
+            f'{question}__poll_id__archived_at__isnull': True,
+        })
+        if after:
+            queryset = queryset.filter(Q(created_at__lt=after[0]) | Q(created_at=after[0], **{f'{pk}__lt': after[1]}))
+        return list(queryset.order_by('-created_at', f'-{pk}').values(
+            'created_at', *fields,
+            row_id=F(pk),
+            question=F(f'{question}__question_id'),
+            question_text=F(f'{question}__question_text'),
+            poll=F(f'{question}__poll_id'),
+            poll_title=F(f'{question}__poll_id__title'),
+        )[:page_size + 1])
+
+    votes = newest(Votes.objects.all(), 'vote_id', 'option_id__question_id', 'option_id', 'option_id__option_text')
+    ballots = newest(RankedBallot.objects.all(), 'ballot_id', 'question_id', 'ranking')
+    rows = sorted(votes + ballots, key=lambda row: (row['created_at'], row['row_id']), reverse=True)
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = _encode_cursor(t=rows[-1]['created_at'], id=rows[-1]['row_id'])
+
+    # Rankings hold option indexes; map them back to option ids
+    option_ids = {}
+    ranked_questions = {row['question'] for row in rows if 'ranking' in row}
+    for question_id, option_id in Options.objects.filter(question_id__in=ranked_questions).order_by('option_id').values_list('question_id', 'option_id'):
+        option_ids.setdefault(question_id, []).append(str(option_id))
+
+    history = []
+    for row in rows:
+        item = {
+            'type': 'ranked' if 'ranking' in row else 'vote',
+            'id': str(row['row_id']),
+            'poll_id': str(row['poll']),
+            'poll_title': row['poll_title'],
+            'question_id': str(row['question']),
+            'question_text': row['question_text'],
+        }
+        if 'ranking' in row:
+            item['ranking'] = [option_ids[row['question']][index] for index in row['ranking']]
+        else:
+            item['option_id'] = str(row['option_id'])
+            item['option_text'] = row['option_id__option_text']
+        item['created_at'] = row['created_at']
+        history.append(item)
+    return history, next_cursor
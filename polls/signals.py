@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent after polls are closed, either manually by their owner
+# or in bulk by the expiry scheduler (`close_expired_polls`).
+# Receivers get `poll_ids`: the primary keys of the polls just closed.
+poll_closed = Signal()
@@ -1,3 +1,732 @@
-from django.test import TestCase
+import io
+import json
+import math
+import random
+import tempfile
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as ModelValidationError
+from django.core.management import call_command
+from django.db import connection, connections, router, transaction
+from django.db.models import Value
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from redis.client import Pipeline, Redis
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from online_poll_system.db_router import ReplicaRoutingMiddleware, check_replica_pin_cache
+from online_poll_system.openapi import schema_document
+from user.models import User
+from . import idempotency
+from .management.commands.benchmark_renderers import Command as BenchmarkRenderersCommand
+from .ballot_import import import_ballots
+from .models import Polls, Questions, Options, Votes, RankedBallot, RankedBallotPattern, OutboxEvent, PollTrend
+from .outbox import QueueSink, relay_outbox
+from .ranked import instant_runoff
+from .serializers import PollsSerializer, QuestionsSerializer, PollsReadSerializer, QuestionsReadSerializer, VotesSerializer
+from .services import _encode_cursor, clone_poll, handle_result, purge_deleted_polls, soft_delete_poll
+from .throttles import IPRateThrottle
 
-# Create your tests here.
+
+class ReadSerializerContractTests(TestCase):
+    """
+    The `.values()`-based read serializers must render exactly what the
+    ModelSerializers they replace on list/retrieve render.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.polls = [
+            Polls.objects.create(title="Open", description="First", created_by=cls.owner, is_public=True),
+            Polls.objects.create(
+                title="Expiring", description="", created_by=cls.owner, is_public=False,
+                expires_at=timezone.now() + timedelta(days=1),
+            ),
+        ]
+        for poll in cls.polls:
+            for index, question_type in enumerate([Questions.SINGLE, Questions.MULTIPLE]):
+                question = Questions.objects.create(poll_id=poll, question_text=f"Q{index}", question_type=question_type)
+                Options.objects.bulk_create([Options(question_id=question, option_text=f"O{n}") for n in range(3)])
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_polls_output_is_byte_identical(self):
+        reader = PollsReadSerializer()
+        queryset = Polls.objects.order_by('created_at')
+        expected = PollsSerializer(queryset, many=True).data
+        rows = queryset.values(*reader.fields)
+        self.assertEqual(self.render(reader.many(rows)), self.render(expected))
+
+    def test_poll_from_instance_is_byte_identical(self):
+        reader = PollsReadSerializer()
+        poll = self.polls[1]
+        self.assertEqual(
+            self.render(reader.to_representation(reader.row_from_instance(poll))),
+            self.render(PollsSerializer(poll).data),
+        )
+
+    def test_questions_output_is_byte_identical(self):
+        # `my_vote` is the one field the readers add on top
+        reader = QuestionsReadSerializer()
+        queryset = Questions.objects.order_by('created_at', 'question_id')
+        expected = QuestionsSerializer(queryset, many=True).data
+        rows = queryset.annotate(my_vote=Value(False)).values(*reader.fields)
+        questions = reader.many(rows)
+        for question in questions:
+            self.assertIs(question.pop('my_vote'), False)
+        self.assertEqual(self.render(questions), self.render(expected))
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.poll = Polls.objects.create(title="Cached", description="", created_by=cls.owner, is_public=True)
+
+    def get(self, path, **headers):
+        return self.client.get(path, secure=True, **headers)
+
+    def test_not_modified_carries_validators(self):
+        path = f'/api/polls/{self.poll.pk}/'
+        first = self.get(path)
+        self.assertEqual(first.status_code, 200)
+
+        again = self.get(path, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+        self.assertEqual(again['Last-Modified'], first['Last-Modified'])
+
+    def test_list_not_modified_until_a_poll_changes(self):
+        first = self.get('/api/polls/')
+        self.assertEqual(self.get('/api/polls/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        Polls.objects.create(title="New", description="", created_by=self.owner, is_public=True)
+        self.assertEqual(self.get('/api/polls/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], DB_REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Routing decisions made inside a request, with `replica_0` standing in
+    for a replica next to the `default` primary.
+    """
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(self.route)
+
+    def route(self, request):
+        # Records where the view's reads and writes would go
+        self.routed = (router.db_for_read(Polls), router.db_for_write(Polls))
+        return HttpResponse()
+
+    def send(self, method, token='a'):
+        request = getattr(self.factory, method)('/api/polls/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.middleware(request)
+        return self.routed
+
+    def test_safe_request_reads_from_replica(self):
+        self.assertEqual(self.send('get'), ('replica_0', 'default'))
+
+    def test_unsafe_request_reads_and_writes_primary(self):
+        self.assertEqual(self.send('post'), ('default', 'default'))
+
+    def test_reads_after_a_write_are_pinned_to_primary(self):
+        self.send('post', token='writer')
+        self.assertEqual(self.send('get', token='writer'), ('default', 'default'))
+        # Other clients are not pinned
+        self.assertEqual(self.send('get', token='reader'), ('replica_0', 'default'))
+
+    def test_guests_behind_one_address_are_pinned_apart(self):
+        def send(method, token):
+            request = getattr(self.factory, method)('/api/polls/', REMOTE_ADDR='203.0.113.9', HTTP_X_GUEST_TOKEN=token)
+            self.middleware(request)
+            return self.routed
+
+        send('post', 'voter')
+        self.assertEqual(send('get', 'voter'), ('default', 'default'))
+        self.assertEqual(send('get', 'neighbour'), ('replica_0', 'default'))
+
+    def test_reads_outside_a_request_use_primary(self):
+        self.assertEqual(router.db_for_read(Polls), 'default')
+
+    def test_check_requires_shared_cache(self):
+        self.assertEqual([error.id for error in check_replica_pin_cache()], ['online_poll_system.E001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/0'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_replica_pin_cache(), [])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/0'}})
+class SlidingWindowThrottleTests(SimpleTestCase):
+    """
+    Each check must be a single round trip to Redis. Pipelines run against an
+    in-memory store; any command sent outside a pipeline is recorded too.
+    """
+    def setUp(self):
+        self.store, self.round_trips = {}, []
+        patch.object(Pipeline, 'execute', autospec=True, side_effect=self.execute).start()
+        patch.object(Redis, 'execute_command', lambda client, *args, **options: self.round_trips.append([args[0]])).start()
+        self.addCleanup(patch.stopall)
+
+    def execute(self, pipeline):
+        commands = [args for args, options in pipeline.command_stack]
+        pipeline.reset()
+        self.round_trips.append([args[0] for args in commands])
+        results = []
+        for name, key, *rest in commands:
+            if name == 'SET':  # NX
+                results.append(True if key not in self.store else None)
+                self.store.setdefault(key, 0)
+            elif name == 'INCRBY':
+                self.store[key] = self.store.get(key, 0) + rest[0]
+                results.append(self.store[key])
+            else:
+                results.append(str(self.store[key]).encode() if key in self.store else None)
+        return results
+
+    def test_each_check_is_one_round_trip(self):
+        request = RequestFactory().post('/', REMOTE_ADDR=f'10.9.{uuid.uuid4().int % 250}.1')
+        view = SimpleNamespace(action='vote', kwargs={})
+        allowed = []
+        for _ in range(4):
+            throttle = IPRateThrottle()
+            throttle.THROTTLE_RATES = {'vote.ip': '3/hour'}
+            allowed.append(throttle.allow_request(request, view))
+        self.assertEqual(allowed, [True, True, True, False])
+        # The previous window is read once, then memoized
+        self.assertEqual(self.round_trips, [['SET', 'INCRBY', 'GET']] + [['SET', 'INCRBY']] * 3)
+
+
+class ConcurrentVoteTests(TestCase):
+    """
+    Two requests from the same voter that both pass validation before
+    either is saved, as concurrent retries on different workers would.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.voter = User.objects.create_user(username='voter', email='voter@example.com', password='pw')
+        poll = Polls.objects.create(title="Race", description="", created_by=cls.voter, is_public=True)
+        cls.questions = {}
+        for question_type in (Questions.SINGLE, Questions.MULTIPLE):
+            question = Questions.objects.create(poll_id=poll, question_text=question_type, question_type=question_type)
+            Options.objects.bulk_create([Options(question_id=question, option_text=f"O{n}") for n in range(2)])
+            cls.questions[question_type] = question
+
+    def validated(self, question, option):
+        context = {'request': SimpleNamespace(user=self.voter, auth=None), 'question': question}
+        serializer = VotesSerializer(data={'option_id': option.pk}, context=context)
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def race(self, question_type, second_option):
+        question = self.questions[question_type]
+        options = list(question.options.order_by('option_id'))
+        first, second = self.validated(question, options[0]), self.validated(question, options[second_option])
+        first.save()
+        with self.assertRaises(ValidationError):
+            second.save()
+        self.assertEqual(Votes.objects.filter(option_id__question_id=question).count(), 1)
+
+    def test_single_choice_keeps_one_vote(self):
+        self.race(Questions.SINGLE, second_option=1)
+
+    def test_multiple_choice_keeps_one_vote_per_option(self):
+        self.race(Questions.MULTIPLE, second_option=0)
+
+
+@override_settings(ALLOWED_HOSTS=['polls.example.com'])
+class OpenAPISchemaTests(SimpleTestCase):
+    """
+    Schema generation must not depend on the synthetic request's host,
+    which a production `ALLOWED_HOSTS` does not list.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = Path(self.directory.name) / 'openapi.json'
+        schema_document.cache_clear()
+        self.addCleanup(schema_document.cache_clear)
+
+    def test_command_writes_schema(self):
+        call_command('generate_openapi_schema', output=str(self.path), stdout=io.StringIO())
+        schema = json.loads(self.path.read_bytes())
+        self.assertIn('/polls/', schema['paths'])
+        self.assertNotIn('host', schema)
+
+    def test_served_schema_is_generated_on_first_request(self):
+        with override_settings(OPENAPI_SCHEMA_FILE=self.path):
+            response = self.client.get('/api/docs/openapi.json', secure=True, HTTP_HOST='polls.example.com')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/polls/', json.loads(response.content)['paths'])
+
+
+class PurgeDeletedPollsTests(TestCase):
+    """
+    Purging a poll with many votes deletes them in fixed-size chunks and
+    only ever reads their IDs.
+    """
+    VOTES = 250
+    BALLOTS = 120
+    BATCH_SIZE = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.poll, cls.kept = [
+            Polls.objects.create(title=title, description="", created_by=cls.owner, is_public=True)
+            for title in ("Deleted", "Kept")
+        ]
+        for poll in (cls.poll, cls.kept):
+            question = Questions.objects.create(poll_id=poll, question_text="Pick", question_type=Questions.MULTIPLE)
+            ranked = Questions.objects.create(poll_id=poll, question_text="Rank", question_type=Questions.RANKED)
+            option = Options.objects.create(question_id=question, option_text="Only")
+            Votes.objects.bulk_create([Votes(option_id=option, guest_id=uuid.uuid4()) for _ in range(cls.VOTES)])
+            RankedBallot.objects.bulk_create([
+                RankedBallot(question_id=ranked, guest_id=uuid.uuid4(), ranking=[0]) for _ in range(cls.BALLOTS)
+            ])
+
+    def test_soft_deleted_poll_is_hidden_then_purged_in_batches(self):
+        soft_delete_poll(self.poll)
+        self.assertEqual(self.client.get(f'/api/polls/{self.poll.pk}/', secure=True).status_code, 404)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(purge_deleted_polls(batch_size=self.BATCH_SIZE), 1)
+
+        statements = [query['sql'] for query in queries]
+        # Chunked deletes by primary key; the poll's own cascade then finds nothing left
+        vote_deletes = [sql for sql in statements if sql.startswith('DELETE FROM "votes" WHERE "votes"."vote_id" IN')]
+        ballot_deletes = [sql for sql in statements if sql.startswith('DELETE FROM "ranked_ballots" WHERE "ranked_ballots"."ballot_id" IN')]
+        self.assertEqual(len(vote_deletes), -(-self.VOTES // self.BATCH_SIZE))
+        self.assertEqual(len(ballot_deletes), -(-self.BALLOTS // self.BATCH_SIZE))
+        # Vote and ballot rows are never loaded, only their IDs
+        for sql in statements:
+            if sql.startswith('SELECT') and ('FROM "votes"' in sql or 'FROM "ranked_ballots"' in sql):
+                self.assertRegex(sql, r'^SELECT "(votes"\."vote_id|ranked_ballots"\."ballot_id)"( AS "\w+")? FROM')
+
+        self.assertFalse(Polls.objects.filter(pk=self.poll.pk).exists())
+        self.assertEqual(Votes.objects.count(), self.VOTES)
+        self.assertEqual(RankedBallot.objects.count(), self.BALLOTS)
+        self.assertTrue(Polls.objects.filter(pk=self.kept.pk).exists())
+
+
+class ArchivedPollQuestionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.poll = Polls.objects.create(title="Archived", description="", created_by=cls.owner, is_public=True)
+        cls.question = Questions.objects.create(poll_id=cls.poll, question_text="Q", question_type=Questions.SINGLE)
+        Polls.objects.filter(pk=cls.poll.pk).update(archived_at=timezone.now())
+
+    def test_questions_of_archived_polls_are_hidden(self):
+        base = f'/api/polls/{self.poll.pk}/questions/'
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(base, secure=True).json(), [])
+        self.assertEqual(self.client.get(f'{base}{self.question.pk}/', secure=True).status_code, 404)
+
+
+class CursorValidationTests(TestCase):
+    """
+    Tampered cursors are a 400, never a 500.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        for index in range(3):
+            Polls.objects.create(title=f"Lunch poll {index}", description="", created_by=cls.owner, is_public=True)
+
+    def get(self, path, **params):
+        return self.client.get(path, params, secure=True)
+
+    def test_search_pages_with_its_cursor(self):
+        first = self.get('/api/polls/', search='lunch', page_size=2).json()
+        self.assertEqual(len(first['results']), 2)
+        second = self.get('/api/polls/', search='lunch', page_size=2, cursor=first['next']).json()
+        self.assertEqual(len(second['results']), 1)
+
+    def test_search_rejects_tampered_cursors(self):
+        poll_id = str(Polls.objects.first().pk)
+        for cursor in (
+            _encode_cursor(m='bogus', r=0.5, id=poll_id),
+            _encode_cursor(m='fts', r=0.5, id='not-a-uuid'),
+            _encode_cursor(m='trgm', r=0.5, id=42),
+            'not base64',
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.get('/api/polls/', search='lunch', cursor=cursor)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.json())
+
+    def test_trending_rejects_tampered_cursors(self):
+        for cursor in (_encode_cursor(s=1.0, id='not-a-uuid'), _encode_cursor(s='high', id=str(uuid.uuid4()))):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.get('/api/polls/trending/', cursor=cursor).status_code, 400)
+
+
+class InstantRunoffTieTests(SimpleTestCase):
+    def eliminated(self, rounds):
+        return [round_result['eliminated'] for round_result in rounds]
+
+    def test_tied_group_that_could_win_is_not_eliminated_together(self):
+        # Together the tied 1 and 2 outpoll 0, so only one of them goes (by option order)
+        winner, rounds = instant_runoff([((0, 1), 3), ((1, 0), 2), ((2, 1), 2)], range(3))
+        self.assertEqual(winner, 1)
+        self.assertEqual(self.eliminated(rounds), [[2], []])
+        self.assertEqual(rounds[-1]['tallies'], {0: 3, 1: 4})
+
+    def test_tied_group_below_next_lowest_is_eliminated_together(self):
+        winner, rounds = instant_runoff([((0,), 4), ((1,), 1), ((2,), 1), ((3,), 3)], range(4))
+        self.assertEqual(winner, 0)
+        self.assertEqual(self.eliminated(rounds)[0], [1, 2])
+
+    def test_tie_broken_by_earlier_round(self):
+        # 1 and 2 tie in round two; 1 had fewer votes in round one
+        winner, rounds = instant_runoff([((0,), 5), ((2,), 3), ((1,), 2), ((3, 1), 1)], range(4))
+        self.assertEqual(self.eliminated(rounds)[:2], [[3], [1]])
+        self.assertEqual(winner, 0)
+
+    def test_all_tied_has_no_winner(self):
+        winner, rounds = instant_runoff([((0,), 2), ((1,), 2)], range(2))
+        self.assertIsNone(winner)
+        self.assertEqual(self.eliminated(rounds), [[]])
+
+
+class RankedOptionsLockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.poll = Polls.objects.create(title="Ranked", description="", created_by=cls.owner, is_public=True)
+        cls.question = Questions.objects.create(poll_id=cls.poll, question_text="Rank", question_type=Questions.RANKED)
+        cls.options = Options.objects.bulk_create([Options(question_id=cls.question, option_text=f"O{n}") for n in range(3)])
+
+    def test_options_change_freely_before_any_ballot(self):
+        Options.objects.create(question_id=self.question, option_text="Late")
+        self.options[0].delete()
+
+    def test_options_are_frozen_once_ballots_exist(self):
+        RankedBallot.objects.create(question_id=self.question, user_id=self.owner, ranking=[0, 1])
+        with self.assertRaises(ModelValidationError):
+            Options.objects.create(question_id=self.question, option_text="Late")
+        with self.assertRaises(ModelValidationError), transaction.atomic():
+            self.options[0].delete()
+        with self.assertRaises(ModelValidationError), transaction.atomic():
+            Options.objects.filter(question_id=self.question).delete()
+        with self.assertRaises(ModelValidationError):
+            Options(question_id=self.question, option_text="Late").full_clean()
+        # Renaming keeps positions, and the question can still be removed as a whole
+        self.options[1].option_text = "Renamed"
+        self.options[1].save()
+        self.poll.delete()
+
+    def test_deleting_the_owner_removes_the_ranked_poll(self):
+        RankedBallot.objects.create(question_id=self.question, guest_id=uuid.uuid4(), ranking=[0, 1])
+        self.owner.delete()
+        self.assertFalse(Options.objects.filter(question_id=self.question).exists())
+
+    def test_admin_bulk_delete_refuses_locked_options(self):
+        other = Questions.objects.create(poll_id=self.poll, question_text="Free", question_type=Questions.RANKED)
+        free = Options.objects.create(question_id=other, option_text="Free")
+        RankedBallot.objects.create(question_id=self.question, guest_id=uuid.uuid4(), ranking=[0, 1])
+        admin_user = User.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        self.client.force_login(admin_user)
+
+        def delete_selected(*options):
+            return self.client.post('/admin/polls/options/', {
+                'action': 'delete_selected', 'post': 'yes', '_selected_action': [str(option.pk) for option in options],
+            }, secure=True)
+
+        self.assertEqual(delete_selected(self.options[0], free).status_code, 403)
+        self.assertEqual(Options.objects.filter(question_id__poll_id=self.poll).count(), 4)
+        self.assertEqual(delete_selected(free).status_code, 302)
+        self.assertFalse(Options.objects.filter(pk=free.pk).exists())
+
+
+class CloneOutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.poll = Polls.objects.create(title="Source", description="", created_by=cls.owner, is_public=True)
+        single = Questions.objects.create(poll_id=cls.poll, question_text="Pick", question_type=Questions.SINGLE)
+        ranked = Questions.objects.create(poll_id=cls.poll, question_text="Rank", question_type=Questions.RANKED)
+        option = Options.objects.create(question_id=single, option_text="Yes")
+        Options.objects.bulk_create([Options(question_id=ranked, option_text=f"R{n}") for n in range(3)])
+        Votes.objects.bulk_create([Votes(option_id=option, guest_id=uuid.uuid4()) for _ in range(4)])
+        RankedBallot.objects.bulk_create([RankedBallot(question_id=ranked, guest_id=uuid.uuid4(), ranking=[2, 0]) for _ in range(3)])
+
+    def test_copied_votes_and_ballots_get_outbox_events(self):
+        clone = clone_poll(self.poll, self.owner, include_votes=True)
+        events = OutboxEvent.objects.filter(poll_id=clone.pk)
+        self.assertEqual(events.filter(event_type=OutboxEvent.VOTE_CAST).count(), 4)
+        self.assertEqual(events.filter(event_type=OutboxEvent.BALLOT_CAST).count(), 3)
+
+        clone_options = {str(option_id) for option_id in Options.objects.filter(question_id__poll_id=clone).values_list('option_id', flat=True)}
+        source_ranked = list(Options.objects.filter(question_id__poll_id=self.poll, question_id__question_type=Questions.RANKED).order_by('option_id'))
+        expected_ranking = [source_ranked[2].option_text, source_ranked[0].option_text]
+        text_of = dict(Options.objects.filter(question_id__poll_id=clone).values_list('option_id', 'option_text'))
+        for event in events:
+            if event.event_type == OutboxEvent.VOTE_CAST:
+                self.assertIn(event.payload['option_id'], clone_options)
+            else:
+                # The same preferences, expressed with the clone's option IDs
+                self.assertEqual([text_of[uuid.UUID(option_id)] for option_id in event.payload['ranking']], expected_ranking)
+
+
+class OutboxOrderingTests(TransactionTestCase):
+    """
+    An event whose transaction started first but committed last must not
+    be overtaken by one that was published while it was still open.
+    """
+    def test_events_wait_for_older_open_transactions(self):
+        sink = QueueSink(name=f'ordering-{uuid.uuid4()}')
+        poll_id = uuid.uuid4()
+        older = connections.create_connection('default')
+        try:
+            with older.cursor() as cursor:
+                # Takes a transaction ID before the other event is written
+                cursor.execute("BEGIN")
+                cursor.execute("SELECT pg_current_xact_id()")
+                newer = OutboxEvent.objects.create(event_type=OutboxEvent.POLL_CLOSED, poll_id=poll_id, payload={})
+                self.assertEqual(relay_outbox(sink), 0)
+
+                cursor.execute(
+                    "INSERT INTO outbox_events (event_type, poll_id, payload, created_at) VALUES (%s, %s, '{}', now()) RETURNING id",
+                    [OutboxEvent.POLL_CLOSED, poll_id],
+                )
+                first = cursor.fetchone()[0]
+                self.assertGreater(first, newer.pk)
+                cursor.execute("COMMIT")
+        finally:
+            older.close()
+
+        self.assertEqual(relay_outbox(sink), 2)
+        self.assertEqual([sink.queue.get_nowait()['id'] for _ in range(2)], [first, newer.pk])
+
+
+class BallotImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.voter = User.objects.create_user(username='voter', email='voter@example.com', password='pw')
+        cls.poll = Polls.objects.create(title="Offline", description="", created_by=cls.voter, is_public=True)
+        cls.questions, cls.options = {}, {}
+        for question_type in (Questions.SINGLE, Questions.MULTIPLE, Questions.RANKED):
+            question = Questions.objects.create(poll_id=cls.poll, question_text=question_type, question_type=question_type)
+            cls.questions[question_type] = question
+            Options.objects.bulk_create([Options(question_id=question, option_text=f"O{n}") for n in range(3)])
+            # In ballot order, so a ranked ballot's indexes match positions here
+            cls.options[question_type] = list(question.options.order_by('option_id'))
+        cls.closed = Polls.objects.create(title="Closed", description="", created_by=cls.voter, is_public=True, is_closed=True)
+        cls.closed_question = Questions.objects.create(poll_id=cls.closed, question_text="Late", question_type=Questions.SINGLE)
+        cls.closed_option = Options.objects.create(question_id=cls.closed_question, option_text="Yes")
+
+    def row(self, question_type, option=0, **voter):
+        return {
+            'question_id': str(self.questions[question_type].pk),
+            'option_id': str(self.options[question_type][option].pk),
+            **(voter or {'user_id': str(self.voter.pk)}),
+        }
+
+    def run_import(self, *rows):
+        return import_ballots(enumerate(rows, start=1))
+
+    def test_duplicates_are_dropped_within_the_file_and_against_existing_votes(self):
+        Votes.objects.create(option_id=self.options[Questions.SINGLE][1], user_id=self.voter)
+        guest = {'guest_id': str(uuid.uuid4())}
+        summary = self.run_import(
+            self.row(Questions.SINGLE),  # already voted on the question
+            self.row(Questions.MULTIPLE, 0), self.row(Questions.MULTIPLE, 0), self.row(Questions.MULTIPLE, 1),
+            self.row(Questions.SINGLE, 0, **guest), self.row(Questions.SINGLE, 1, **guest),
+        )
+        self.assertEqual((summary['votes'], summary['duplicates'], summary['skipped']), (3, 3, 0))
+        self.assertEqual(Votes.objects.filter(option_id__question_id=self.questions[Questions.SINGLE], user_id=self.voter).count(), 1)
+        self.assertEqual(Votes.objects.filter(guest_id=guest['guest_id']).get().option_id, self.options[Questions.SINGLE][0])
+        self.assertEqual(OutboxEvent.objects.filter(event_type=OutboxEvent.VOTE_CAST, poll_id=self.poll.pk).count(), 3)
+
+    def test_rows_for_closed_or_unknown_polls_and_options_are_rejected(self):
+        late = {'question_id': str(self.closed_question.pk), 'option_id': str(self.closed_option.pk), 'user_id': str(self.voter.pk)}
+        summary = self.run_import(
+            late,
+            {**self.row(Questions.SINGLE), 'question_id': str(uuid.uuid4())},
+            {**self.row(Questions.SINGLE), 'option_id': str(self.closed_option.pk)},
+            {**self.row(Questions.SINGLE), 'user_id': str(uuid.uuid4())},
+            self.row(Questions.RANKED),
+        )
+        self.assertEqual((summary['staged'], summary['skipped'], summary['votes']), (0, 5, 0))
+        self.assertEqual([error['line'] for error in summary['errors']], [1, 2, 3, 4, 5])
+        self.assertEqual(summary['errors'][0]['error'], "Voting is closed or expired for this poll (see --allow-closed).")
+        self.assertEqual(import_ballots([(1, late)], allow_closed=True)['votes'], 1)
+
+    def test_ranked_ballots_update_patterns(self):
+        options = self.options[Questions.RANKED]
+        ranked = {'question_id': str(self.questions[Questions.RANKED].pk)}
+        summary = self.run_import(
+            {**ranked, 'ranking': [str(options[2].pk), str(options[0].pk)], 'user_id': str(self.voter.pk)},
+            {**ranked, 'ranking': [str(options[1].pk)], 'user_id': str(self.voter.pk)},  # second ballot, dropped
+            {**ranked, 'ranking': [str(options[2].pk), str(options[0].pk)], 'guest_id': str(uuid.uuid4())},
+            {**ranked, 'ranking': [str(options[0].pk), str(options[0].pk)], 'guest_id': str(uuid.uuid4())},
+        )
+        self.assertEqual((summary['ballots'], summary['duplicates'], summary['skipped']), (2, 1, 1))
+        self.assertEqual(RankedBallot.objects.get(user_id=self.voter).ranking, [2, 0])
+        pattern = RankedBallotPattern.objects.get(question_id=self.questions[Questions.RANKED])
+        self.assertEqual((pattern.ranking, pattern.ballot_count), ([2, 0], 2))
+
+    def test_trend_score_grows_with_merged_votes(self):
+        now = timezone.now()
+        self.run_import({**self.row(Questions.MULTIPLE, 0), 'created_at': now.isoformat()})
+        first = PollTrend.objects.get(poll_id=self.poll).score
+        self.run_import({**self.row(Questions.MULTIPLE, 1), 'created_at': now.isoformat()})
+        # A second vote at the same moment doubles the activity: + ln 2 in log space
+        self.assertAlmostEqual(PollTrend.objects.get(poll_id=self.poll).score - first, math.log(2))
+
+    def test_merge_holds_off_api_votes_on_single_choice_questions(self):
+        self.run_import(self.row(Questions.SINGLE))
+        # The import's transaction is still open here (the test's), so the
+        # shared lock `lock_voter` takes on the question is unavailable
+        other = connections.create_connection('default')
+        try:
+            with other.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_try_advisory_lock_shared(hashtextextended(%s, 0))", [str(self.questions[Questions.SINGLE].pk)]
+                )
+                self.assertIs(cursor.fetchone()[0], False)
+        finally:
+            other.close()
+
+
+class IdempotentVoteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.voter = User.objects.create_user(username='voter', email='voter@example.com', password='pw')
+        poll = Polls.objects.create(title="Retries", description="", created_by=cls.voter, is_public=True)
+        question = Questions.objects.create(poll_id=poll, question_text="Pick", question_type=Questions.MULTIPLE)
+        cls.options = Options.objects.bulk_create([Options(question_id=question, option_text=f"O{n}") for n in range(2)])
+        cls.path = f'/api/polls/{poll.pk}/questions/{question.pk}/vote/'
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.voter)
+
+    def vote(self, option, key='retry-1'):
+        return self.client.post(
+            self.path, {'option_id': str(self.options[option].pk)},
+            content_type='application/json', secure=True, HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.vote(0)
+        replay = self.vote(0)
+        self.assertEqual((replay.status_code, replay.json()), (first.status_code, first.json()))
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(Votes.objects.filter(user_id=self.voter).count(), 1)
+        # Another key is another request
+        self.assertEqual(self.vote(1, key='retry-2').status_code, 200)
+
+    def test_key_reused_with_another_body_is_rejected(self):
+        self.vote(0)
+        response = self.vote(1)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Votes.objects.filter(user_id=self.voter).count(), 1)
+
+    def test_duplicate_gives_up_while_the_first_is_in_flight(self):
+        # The first request holds the key's lock and never stores a response
+        request = SimpleNamespace(auth=None, user=self.voter, path=self.path, META={})
+        cache.add(idempotency.LOCK_KEY.format(idempotency._scope(request, 'retry-1')), 1)
+        with patch.object(idempotency, 'LOCK_WAIT', 0.2):
+            response = self.vote(0)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Votes.objects.exists())
+
+
+class BenchmarkPayloadTests(TestCase):
+    def test_renderer_benchmark_payload_has_the_results_shape(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        poll = Polls.objects.create(title="Shape", description="", created_by=owner, is_public=True)
+        question = Questions.objects.create(poll_id=poll, question_text="Pick", question_type=Questions.SINGLE)
+        Options.objects.create(question_id=question, option_text="Yes")
+
+        def shape(value):
+            if isinstance(value, dict):
+                return [(key, shape(item)) for key, item in value.items()]
+            if isinstance(value, list):
+                return [shape(value[0])]
+            return None
+
+        payload = BenchmarkRenderersCommand().results(random.Random(0), 1, 1, stringify=True)
+        self.assertEqual(shape(payload), shape(handle_result(poll)))
+
+
+class OutboxEventAdminTests(TestCase):
+    def test_events_are_read_only(self):
+        admin_user = User.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        event = OutboxEvent.objects.create(event_type=OutboxEvent.POLL_CLOSED, poll_id=uuid.uuid4(), payload={})
+        self.client.force_login(admin_user)
+        self.assertEqual(self.client.get('/admin/polls/outboxevent/', secure=True).status_code, 200)
+        self.assertEqual(self.client.post(f'/admin/polls/outboxevent/{event.pk}/delete/', {'post': 'yes'}, secure=True).status_code, 403)
+        self.assertTrue(OutboxEvent.objects.filter(pk=event.pk).exists())
+
+
+class GuestVotingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pw')
+        cls.poll = Polls.objects.create(title="Guests", description="", created_by=cls.owner, is_public=True)
+        cls.questions, cls.option_ids = {}, {}
+        for question_type in (Questions.SINGLE, Questions.MULTIPLE):
+            question = Questions.objects.create(poll_id=cls.poll, question_text=question_type, question_type=question_type)
+            options = Options.objects.bulk_create([Options(question_id=question, option_text=f"O{n}") for n in range(2)])
+            cls.questions[question_type] = question
+            cls.option_ids[question_type] = [str(option.pk) for option in options]
+
+    def issue_token(self):
+        response = self.client.post('/api/polls/guest-token/', secure=True)
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def vote(self, token, question_type, option=0):
+        question = self.questions[question_type]
+        return self.client.post(
+            f'/api/polls/{self.poll.pk}/questions/{question.pk}/vote/',
+            {'option_id': self.option_ids[question_type][option]},
+            content_type='application/json', secure=True, HTTP_X_GUEST_TOKEN=token,
+        )
+
+    def assert_rejected(self, response):
+        # No WWW-Authenticate challenge for guest tokens, so DRF answers 403
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['detail'], "Invalid or expired guest token.")
+
+    def test_guest_votes_with_token(self):
+        guest = self.issue_token()
+        self.assertEqual(self.vote(guest['guest_token'], Questions.SINGLE).status_code, 200)
+        vote = Votes.objects.get()
+        self.assertEqual((str(vote.guest_id), vote.user_id_id), (guest['guest_id'], None))
+
+    def test_duplicate_guest_votes_are_rejected(self):
+        token = self.issue_token()['guest_token']
+        self.assertEqual(self.vote(token, Questions.SINGLE).status_code, 200)
+        self.assertEqual(self.vote(token, Questions.SINGLE, option=1).status_code, 400)
+        # Multiple choice: another option is fine, the same one again is not
+        self.assertEqual(self.vote(token, Questions.MULTIPLE).status_code, 200)
+        self.assertEqual(self.vote(token, Questions.MULTIPLE, option=1).status_code, 200)
+        self.assertEqual(self.vote(token, Questions.MULTIPLE).status_code, 400)
+        self.assertEqual(Votes.objects.count(), 3)
+        # Another guest is a different voter
+        self.assertEqual(self.vote(self.issue_token()['guest_token'], Questions.SINGLE).status_code, 200)
+
+    def test_tampered_token_is_rejected(self):
+        token = self.issue_token()['guest_token']
+        self.assert_rejected(self.vote(token[:-2] + ('AA' if not token.endswith('AA') else 'BB'), Questions.SINGLE))
+        self.assertFalse(Votes.objects.exists())
+
+    def test_expired_token_is_rejected(self):
+        token = self.issue_token()['guest_token']
+        with override_settings(GUEST_TOKEN_MAX_AGE=-1):
+            self.assert_rejected(self.vote(token, Questions.SINGLE))
+        self.assertFalse(Votes.objects.exists())
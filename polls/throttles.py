@@ -0,0 +1,151 @@
+import logging
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import SimpleRateThrottle
+from .visibility import LocalLRU
+
+logger = logging.getLogger(__name__)
+
+# Used when the shared cache is unreachable, so limits still hold per process
+_fallback_cache = LocMemCache('polls-throttle-fallback', {'OPTIONS': {'MAX_ENTRIES': 10000}})
+
+# Final counts of finished windows; keys embed the window number, so entries never go stale
+_previous_counts = LocalLRU(max_entries=10000, ttl=86400)
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding-window rate limit backed by per-window counters in the shared cache.
+
+    - Each check is an atomic `incr` on the current window's counter; with
+      Redis it is one pipelined round trip, together with creating the counter
+      and reading the previous window when needed
+    - The previous window's count is weighted by how much of it still overlaps
+      the sliding window; that count is final once its window has passed, so it
+      is read once per window and memoized in-process
+    - Falls back to in-process counters if the shared cache is unavailable
+
+    The scope is `<view action>.<kind>` (e.g. `vote.user`) and its rate comes from
+    `DEFAULT_THROTTLE_RATES`; actions without a configured rate are not throttled.
+    """
+    kind = None
+
+    def __init__(self):
+        # The rate depends on the view's action, so it is resolved in allow_request()
+        self.rate = None
+
+    @property
+    def cache(self):
+        # The backend itself rather than DRF's `default_cache` proxy, which hides its class
+        return caches['default']
+
+    def get_ident_key(self, request, view):
+        # Identity being limited; None skips throttling for this request
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = f'{view.action}.{self.kind}'
+        self.rate = self.THROTTLE_RATES.get(self.scope)
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        self.elapsed = (now % self.duration) / self.duration
+
+        self.current, self.previous = self.counts(f'{self.key}:{window}', f'{self.key}:{window - 1}')
+
+        estimate = self.previous * (1 - self.elapsed) + self.current
+        return estimate <= self.num_requests
+
+    def counts(self, key, previous_key):
+        # The current window's count including this request, and the previous window's
+        previous = _previous_counts.get(previous_key)
+        read_previous = previous is None
+        try:
+            if isinstance(self.cache, RedisCache):
+                current, stored = self.redis_counts(key, previous_key if read_previous else None)
+            else:
+                current = self.incr(self.cache, key)
+                stored = self.cache.get(previous_key, 0) if read_previous else None
+        except Exception:
+            logger.warning("Throttle cache unavailable, using in-process counters", exc_info=True)
+            current = self.incr(_fallback_cache, key)
+            stored = _fallback_cache.get(previous_key, 0) if read_previous else None
+        if read_previous:
+            previous = stored
+            _previous_counts.set(previous_key, previous)
+        return current, previous
+
+    def redis_counts(self, key, previous_key=None):
+        # One pipeline: SET NX creates the counter with its expiry, so the INCR
+        # needs no existence check (Django's `incr` makes that a second trip)
+        key = self.cache.make_and_validate_key(key)
+        pipeline = self.cache._cache.get_client(key, write=True).pipeline(transaction=False)
+        pipeline.set(key, 0, ex=self.duration * 2, nx=True)
+        pipeline.incr(key)
+        if previous_key is not None:
+            pipeline.get(self.cache.make_and_validate_key(previous_key))
+        results = pipeline.execute()
+        return results[1], int(results[2] or 0) if previous_key is not None else None
+
+    def incr(self, cache, key):
+        # Counters live for two windows: their own, then as "previous"
+        try:
+            return cache.incr(key)
+        except ValueError:
+            if cache.add(key, 1, self.duration * 2):
+                return 1
+            return cache.incr(key)
+
+    def wait(self):
+        # Seconds until the weighted estimate drops back under the limit
+        if self.current > self.num_requests or not self.previous:
+            return self.duration * (1 - self.elapsed)
+        overlap_needed = 1 - (self.num_requests - self.current) / self.previous
+        return max(overlap_needed - self.elapsed, 0) * self.duration
+
+
+class UserRateThrottle(SlidingWindowThrottle):
+    """
+    Limits each authenticated user; anonymous clients are limited by IP.
+    """
+    kind = 'user'
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """
+    Limits each client address, whoever is logged in.
+    """
+    kind = 'ip'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class PollRateThrottle(SlidingWindowThrottle):
+    """
+    Caps total traffic to a single poll, across all clients.
+    """
+    kind = 'poll'
+
+    def get_ident_key(self, request, view):
+        # Nested question routes carry the poll as `poll_pk`, poll routes as `pk`
+        return view.kwargs.get('poll_pk') or view.kwargs.get('pk')
@@ -0,0 +1,70 @@
+"""
+Trending leaderboard: polls ranked by voting activity with exponential decay.
+
+A poll's activity is the sum over its votes of `2 ** (-age / half_life)`, so a
+vote counts 1 when cast and half as much every `TRENDING_HALF_LIFE_MINUTES`.
+Decay scales every poll by the same factor, so the ranking only changes when
+votes come in. Each poll's `PollTrend.score` is therefore stored as
+`log(sum(exp(rate * (cast_at - EPOCH))))`: a vote adds its weight with a
+log-sum-exp step, one single-row UPDATE, and current activity is
+`exp(score - rate * (now - EPOCH))`.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Least, Ln
+from django.utils import timezone
+from .models import PollTrend
+
+# Scores are relative to this instant; any fixed past date works
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Postgres raises on exp() underflow; beyond this gap the smaller term adds nothing
+MAX_LOG_GAP = 700.0
+
+# Polls whose decayed activity is below this (about one vote seven
+# half-lives ago) drop off the leaderboard
+MIN_ACTIVITY = 0.01
+
+
+def decay_rate():
+    # Per second
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_MINUTES * 60)
+
+
+def log_weight(at):
+    # Log of a vote's weight relative to EPOCH
+    return decay_rate() * (at - EPOCH).total_seconds()
+
+
+def activity(score, now=None):
+    # Decayed number of votes a stored score stands for
+    return math.exp(score - log_weight(now or timezone.now()))
+
+
+def min_score(now=None):
+    # Lowest score still on the leaderboard
+    return log_weight(now or timezone.now()) + math.log(MIN_ACTIVITY)
+
+
+def record_activity(poll_id, at=None):
+    """
+    Adds one vote cast at `at` to the poll's score, creating its entry on
+    first use. Run it after the vote commits (`transaction.on_commit`) so
+    the row lock is held for this statement only, not the vote's transaction.
+    """
+    weight = log_weight(at or timezone.now())
+    # log(exp(score) + exp(weight)), computed without overflow
+    gap = Least(Abs(F('score') - Value(weight)), Value(MAX_LOG_GAP))
+    added = Greatest(F('score'), Value(weight)) + Ln(1 + Exp(-gap))
+    trends = PollTrend.objects.filter(poll_id=poll_id)
+    if trends.update(score=added, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            PollTrend.objects.create(poll_id_id=poll_id, score=weight)
+    except IntegrityError:
+        # Another vote created the entry in the meantime
+        trends.update(score=added, updated_at=timezone.now())
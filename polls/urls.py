@@ -1,10 +1,12 @@
 from rest_framework import routers
 from rest_framework_nested import routers as nested_routers
 from django.urls import path, include
-from .views import PollsViewSet, QuestionsViewSet
+from .views import PollsViewSet, QuestionsViewSet, PollTemplateViewSet, ArchivedPollViewSet
 
 router = routers.DefaultRouter()
 router.register(r'polls', PollsViewSet, basename='poll')
+router.register(r'templates', PollTemplateViewSet, basename='poll-template')
+router.register(r'archived-polls', ArchivedPollViewSet, basename='archived-poll')
 
 nested_router = nested_routers.NestedDefaultRouter(
     router, r'polls', lookup='poll')
@@ -1,14 +1,84 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, mixins
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
-from .models import Polls, Questions
-from .serializers import ClosePollSerializer, PollsSerializer, QuestionsSerializer, VotesSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.settings import api_settings
+from django.db.models import Q, Max, Count
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+import hashlib
+import uuid
+from .models import Polls, Questions, PollTemplate, ArchivedPoll
+from .serializers import (
+    ClosePollSerializer, PollsSerializer, QuestionsSerializer, VotesSerializer,
+    ClonePollSerializer, PollTemplateSerializer, ArchivedPollSerializer,
+    PollsReadSerializer, QuestionsReadSerializer,
+)
 from .permissions import PollPermission, VotePermission, QuestionPermission
-from .services import handle_result, handle_vote, close_poll
+from .services import (
+    handle_result, handle_results, handle_vote, close_poll, soft_delete_poll,
+    clone_poll, save_poll_template, instantiate_template, search_polls,
+    voted_annotation, latest_vote_at, clamp_page_size, trending_polls,
+)
+from .idempotency import idempotent
+from .guests import GuestTokenAuthentication, issue_guest_token
+from .throttles import UserRateThrottle, IPRateThrottle, PollRateThrottle
 
-class PollsViewSet(viewsets.ModelViewSet):
+poll_reader = PollsReadSerializer()
+question_reader = QuestionsReadSerializer()
+
+# Applied to the vote and results actions; rates live in DEFAULT_THROTTLE_RATES
+HOT_PATH_THROTTLES = [UserRateThrottle, IPRateThrottle, PollRateThrottle]
+
+# Most polls one `GET /polls/results/?ids=` call may ask for
+MAX_BATCH_RESULTS = 100
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified support for read endpoints.
+    Lets a view answer 304 Not Modified before doing any serialization.
+    """
+    def make_etag(self, *parts):
+        # Scoped to the URL, the user and the negotiated format,
+        # since all three change the body for the same underlying rows
+        key = '|'.join(map(str, (
+            self.request.get_full_path(),
+            self.request.user.pk,
+            self.request.accepted_media_type,
+            *parts,
+        )))
+        return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+    def collection_validators(self, queryset, timestamp_field, *parts):
+        # One cheap aggregate over the visible rows instead of serializing them.
+        # The row count catches deletions, which don't move the max timestamp.
+        stats = queryset.order_by().aggregate(latest=Max(timestamp_field), count=Count('pk'))
+        return self.make_etag(stats['count'], stats['latest'], *parts), stats['latest']
+
+    def vote_validators(self, last_modified):
+        # Bodies carrying `my_vote` change when the caller votes, which doesn't
+        # touch the poll, so the caller's latest vote time joins the validators.
+        # Returns it and the later of the two timestamps.
+        voted_at = latest_vote_at(self.request.user)
+        return voted_at, max(filter(None, (last_modified, voted_at)), default=None)
+
+    def not_modified(self, request, etag, last_modified):
+        # Returns a 304 response if the client's copy is current, otherwise None.
+        # The 304 repeats the validators, as a 200 would carry them.
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            response = self.with_validators(response, etag, last_modified)
+        return response
+
+    def with_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+class PollsViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Handles CRUD operations for polls, including listing,
     creation, closing, and viewing results.
@@ -21,21 +91,74 @@ class PollsViewSet(viewsets.ModelViewSet):
         """
         Returns polls that are public or owned by the
         authenticated user. Anonymous users see only public polls.
+        `?active=true` narrows the list to polls still accepting votes;
+        `?search=` switches `list` to ranked full-text results.
+        `retrieve` flags whether the caller has voted on the poll (`my_vote`).
         """
         user = self.request.user
 
         if user.is_authenticated and user.is_superuser:
             # Superusers can see all polls
-            return Polls.objects.all().order_by('-created_at')
+            queryset = Polls.objects.live()
+        elif user.is_authenticated:
+            queryset = Polls.objects.live().filter(Q(created_by=user) | Q(is_public=True))
+        else:
+            queryset = Polls.objects.live().filter(is_public=True)
 
-        if user.is_authenticated:
-            return Polls.objects.filter(Q(created_by=user) | Q(is_public=True))
-        return Polls.objects.filter(is_public=True).order_by('-created_at').order_by('-created_at')
+        if self.request.query_params.get('active', '').lower() in ('true', '1'):
+            queryset = queryset.open()
+        if self.action == 'retrieve':
+            queryset = queryset.annotate(my_vote=voted_annotation(user, 'poll'))
+        return queryset.order_by('-created_at')
+
+    def list(self, request, *args, **kwargs):
+        # Read hot path: build the response from `.values()` rows
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.collection_validators(queryset, 'last_modified')
+        not_modified = self.not_modified(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+
+        text = request.query_params.get('search', '').strip()
+        if text:
+            # `?search=` returns ranked matches, paged with `?cursor=`
+            rows, next_cursor = search_polls(
+                queryset, text, poll_reader.fields,
+                cursor=request.query_params.get('cursor'),
+                page_size=clamp_page_size(request.query_params.get('page_size')),
+            )
+            response = Response({'results': poll_reader.many(rows), 'next': next_cursor})
+            return self.with_validators(response, etag, last_modified)
+
+        queryset = queryset.values(*poll_reader.fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(poll_reader.many(page))
+        else:
+            response = Response(poll_reader.many(queryset))
+        return self.with_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        poll = self.get_object()
+        voted_at, last_modified = self.vote_validators(poll.last_modified)
+        etag = self.make_etag(poll.pk, poll.last_modified, voted_at)
+        not_modified = self.not_modified(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+
+        data = poll_reader.to_representation(poll_reader.row_from_instance(poll))
+        data['my_vote'] = poll.my_vote
+        return self.with_validators(Response(data), etag, last_modified)
 
     def perform_create(self, serializer):
         # Sets the created_by field to the current user when creating a new poll.
         serializer.save(created_by=self.request.user)
 
+    def perform_destroy(self, instance):
+        # Hides the poll at once; its questions, options and votes
+        # are deleted in chunks by the `purge_deleted_polls` job
+        soft_delete_poll(instance)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], serializer_class=ClosePollSerializer)
     def close(self, request, pk=None):
         """
@@ -46,7 +169,38 @@ class PollsViewSet(viewsets.ModelViewSet):
         message = close_poll(poll, request.user)
         return Response({'detail': message})
     
-    @action(detail=True, methods=["get"], permission_classes=[PollPermission])
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], serializer_class=ClonePollSerializer)
+    def clone(self, request, pk=None):
+        """
+        Copies a visible poll, with all its questions and options, into a new
+        open poll owned by the caller. Votes are left behind unless the owner
+        passes `include_votes: true`.
+        """
+        poll = self.get_object()
+        serializer = ClonePollSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        new_poll = clone_poll(poll, request.user, **serializer.validated_data)
+        return Response(poll_reader.to_representation(poll_reader.row_from_instance(new_poll)), status=201)
+
+    @action(detail=True, methods=['post'], url_path='save-template', permission_classes=[IsAuthenticated], serializer_class=PollTemplateSerializer)
+    def save_template(self, request, pk=None):
+        """
+        Saves this poll's structure as a reusable template (owner only).
+        """
+        poll = self.get_object()
+        template = save_poll_template(poll, request.user, name=request.data.get('name'))
+        return Response(PollTemplateSerializer(template).data, status=201)
+
+    @action(detail=False, methods=['post'], url_path='guest-token', permission_classes=[AllowAny], throttle_classes=[IPRateThrottle])
+    def guest_token(self, request):
+        """
+        Issues a signed guest voter token for voting on public polls
+        without an account. Send it back in the `X-Guest-Token` header.
+        """
+        return Response(issue_guest_token(), status=201)
+
+    @action(detail=True, methods=["get"], permission_classes=[PollPermission], throttle_classes=HOT_PATH_THROTTLES)
     def results(self, request, pk=None):
         """
         Returns the results of a specific poll, 
@@ -61,7 +215,48 @@ class PollsViewSet(viewsets.ModelViewSet):
 
         return Response(results, status=200)
 
-class QuestionsViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["get"], permission_classes=[PollPermission])
+    def trending(self, request):
+        """
+        Polls ranked by recent voting activity, most active first, with their
+        `activity` (votes counted with a `TRENDING_HALF_LIFE_MINUTES` half-life).
+        Served from the precomputed leaderboard; pages with `?cursor=` and
+        `?page_size=` (up to 100). `?active=true` works as on the list.
+        """
+        rows, next_cursor = trending_polls(
+            self.get_queryset(), poll_reader.fields,
+            cursor=request.query_params.get('cursor'),
+            page_size=clamp_page_size(request.query_params.get('page_size')),
+        )
+        results = [dict(poll_reader.to_representation(row), activity=row['activity']) for row in rows]
+        return Response({'results': results, 'next': next_cursor}, status=200)
+
+    @action(detail=False, methods=["get"], url_path='results', url_name='batch-results',
+            permission_classes=[PollPermission], throttle_classes=[UserRateThrottle, IPRateThrottle])
+    def batch_results(self, request):
+        """
+        Returns the results of many polls in one call, for dashboards:
+        `?ids=<poll_id>,<poll_id>,...` (up to 100).
+        Responds with a map of poll ID -> results, shaped like `/polls/{id}/results/`;
+        polls that don't exist or that the caller can't see map to null.
+        """
+        raw_ids = [value for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        if not raw_ids:
+            raise ValidationError({'ids': "Pass one or more comma-separated poll IDs."})
+        if len(raw_ids) > MAX_BATCH_RESULTS:
+            raise ValidationError({'ids': f"At most {MAX_BATCH_RESULTS} polls per request."})
+        try:
+            poll_ids = list(dict.fromkeys(uuid.UUID(value.strip()) for value in raw_ids))
+        except ValueError:
+            raise ValidationError({'ids': "Poll IDs must be UUIDs."})
+
+        # Same visibility rules as `PollPermission` applies to a single poll, in one query
+        polls = self.get_queryset().filter(pk__in=poll_ids).order_by().values('poll_id', 'title')
+        results = dict.fromkeys(map(str, poll_ids))
+        results.update(handle_results(list(polls)))
+        return Response(results, status=200)
+
+class QuestionsViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing poll questions with visibility rules:
     - Unauthenticated users see only questions from public polls.
@@ -76,17 +271,14 @@ class QuestionsViewSet(viewsets.ModelViewSet):
         user = self.request.user
         poll_id = self.kwargs.get('poll_pk') # Get the poll ID from the URL (if nested route)
     
-        if user.is_superuser:
-        # Superuser sees all questions, with optional filtering by poll
-            if poll_id:
-                return Questions.objects.filter(poll_id=poll_id)
-            return Questions.objects.all()
+        # Questions of deleted and archived polls are hidden until the purge removes them
+        base_filter = Q(poll_id__deleted_at__isnull=True) & Q(poll_id__archived_at__isnull=True)
 
-        base_filter = Q() # Start with an empty filter
-        if user.is_authenticated:
+        # Superusers see all questions, with optional filtering by poll
+        if user.is_authenticated and not user.is_superuser:
             # Show questions from polls they created OR polls that are public if authenticated
             base_filter &= Q(poll_id__created_by=user) | Q(poll_id__is_public=True)
-        else:
+        elif not user.is_authenticated:
             # Only show questions from public polls if anonymous
             base_filter &= Q(poll_id__is_public=True)
 
@@ -94,19 +286,105 @@ class QuestionsViewSet(viewsets.ModelViewSet):
             # Filter questions under a specific poll (if nested route)
             base_filter &= Q(poll_id=poll_id)
 
-        return Questions.objects.filter(base_filter)
+        queryset = Questions.objects.filter(base_filter)
+        if self.action in ('list', 'retrieve'):
+            # Whether the caller has answered each question, in the same query
+            queryset = queryset.annotate(my_vote=voted_annotation(user, 'question'))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # Read hot path: build the response from `.values()` rows.
+        # Question and option edits bump their poll's last_modified,
+        # so the polls' timestamps cover the whole listing.
+        queryset = self.filter_queryset(self.get_queryset())
+        voted_at = latest_vote_at(request.user)
+        etag, last_modified = self.collection_validators(queryset, 'poll_id__last_modified', voted_at)
+        last_modified = max(filter(None, (last_modified, voted_at)), default=None)
+        not_modified = self.not_modified(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+
+        queryset = queryset.values(*question_reader.fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(question_reader.many(page))
+        else:
+            response = Response(question_reader.many(queryset))
+        return self.with_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        question = self.get_object()
+        voted_at, last_modified = self.vote_validators(question.poll_id.last_modified)
+        etag = self.make_etag(question.pk, question.poll_id.last_modified, voted_at)
+        not_modified = self.not_modified(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+
+        response = Response(question_reader.many([question_reader.row_from_instance(question)])[0])
+        return self.with_validators(response, etag, last_modified)
 
     def perform_create(self, serializer):
         serializer.save()
     
-    @action(detail=True, methods=["post"], permission_classes=[VotePermission], serializer_class=VotesSerializer )
+    @action(detail=True, methods=["post"], permission_classes=[VotePermission], serializer_class=VotesSerializer, throttle_classes=HOT_PATH_THROTTLES,
+            authentication_classes=api_settings.DEFAULT_AUTHENTICATION_CLASSES + [GuestTokenAuthentication])
+    @idempotent
     def vote(self, request, poll_pk=None, pk=None):
         """
-        Allows authenticated users to vote on this question.
+        Allows authenticated users, or guests with an `X-Guest-Token`, to vote on this question.
         Validates option, duplicates, and poll status via serializer.
+        Retries sent with the same `Idempotency-Key` header replay the first response.
         """
 
         question = self.get_object()
         handle_vote(request, question)
         return Response({"detail": "Vote recorded."})
 
+class PollTemplateViewSet(mixins.ListModelMixin,
+                          mixins.RetrieveModelMixin,
+                          mixins.DestroyModelMixin,
+                          viewsets.GenericViewSet):
+    """
+    Lists, shows and deletes the caller's saved poll templates,
+    and instantiates new polls from them.
+    Templates are created from a poll via `POST /polls/{id}/save-template/`.
+    """
+    serializer_class = PollTemplateSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        # Skip the user filter during Swagger schema generation
+        if getattr(self, 'swagger_fake_view', False):
+            return PollTemplate.objects.none()
+        return PollTemplate.objects.filter(created_by=self.request.user)
+
+    @action(detail=True, methods=['post'], serializer_class=ClonePollSerializer)
+    def instantiate(self, request, pk=None):
+        """
+        Creates a new poll from this template. Only the template is read,
+        never the poll it was saved from.
+        """
+        template = self.get_object()
+        serializer = ClonePollSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        poll = instantiate_template(template, request.user, title=serializer.validated_data.get('title'))
+        return Response(poll_reader.to_representation(poll_reader.row_from_instance(poll)), status=201)
+
+class ArchivedPollViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only access to archived polls and their final results.
+    Same visibility rules as live polls: public archives for everyone,
+    private ones for their owner only.
+    """
+    serializer_class = ArchivedPollSerializer
+    permission_classes = [PollPermission]
+
+    def get_queryset(self):
+        user = self.request.user
+
+        if user.is_authenticated and user.is_superuser:
+            return ArchivedPoll.objects.all()
+        if user.is_authenticated:
+            return ArchivedPoll.objects.filter(Q(created_by=user) | Q(is_public=True))
+        return ArchivedPoll.objects.filter(is_public=True)
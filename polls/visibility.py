@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from .models import Polls
+
+# What the permission classes need to know about a poll, without loading it
+PollVisibility = namedtuple('PollVisibility', ['owner_id', 'is_public', 'is_closed', 'expires_at'])
+
+# Poll columns backing each PollVisibility field, in order
+COLUMNS = ('created_by', 'is_public', 'is_closed', 'expires_at')
+
+CACHE_KEY = 'polls:visibility:{}'
+
+
+class LocalLRU:
+    """
+    Small thread-safe LRU with a per-entry TTL.
+    Sits in front of the shared cache so hot polls cost no network hop;
+    the TTL bounds how long another process's invalidation can go unseen.
+    """
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LocalLRU(
+    settings.POLL_VISIBILITY_CACHE['MAX_ENTRIES'],
+    settings.POLL_VISIBILITY_CACHE['TTL'],
+)
+
+
+def get_poll_visibility(poll_id):
+    """
+    Returns the `PollVisibility` for a poll, or None if it doesn't exist
+    or has been deleted.
+
+    - Checks the per-process LRU first
+    - Falls back to the shared cache, then to a single-row `.values_list()` query
+    - Fills both cache tiers on the way back
+    """
+    key = str(poll_id)
+    visibility = _local.get(key)
+    if visibility is not None:
+        return visibility
+
+    cached = cache.get(CACHE_KEY.format(key))
+    if cached is not None:
+        visibility = PollVisibility(*cached)
+    else:
+        row = Polls.objects.live().filter(pk=poll_id).values_list(*COLUMNS).first()
+        if row is None:
+            return None
+        visibility = PollVisibility(*row)
+        cache.set(CACHE_KEY.format(key), tuple(visibility), settings.POLL_VISIBILITY_CACHE['SHARED_TTL'])
+
+    _local.set(key, visibility)
+    return visibility
+
+
+def invalidate_poll_visibility(*poll_ids):
+    # Drops the cached metadata after a poll is updated, closed or deleted
+    keys = [str(poll_id) for poll_id in poll_ids]
+    for key in keys:
+        _local.delete(key)
+    cache.delete_many([CACHE_KEY.format(key) for key in keys])
+
+
+def can_view_poll(visibility, user):
+    # Public polls are visible to everyone; private ones only to their owner
+    return visibility.is_public or visibility.owner_id == user.pk
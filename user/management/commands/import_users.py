@@ -0,0 +1,40 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from user.services import import_users, read_user_rows
+
+
+class Command(BaseCommand):
+    """
+    Bulk-provisions users from a CSV or NDJSON file.
+    The file is streamed, so very large files use flat memory.
+    """
+    help = "Bulk-create users from a CSV (username,email,password[,first_name,last_name]) or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or - for stdin.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Users per bulk INSERT.")
+        parser.add_argument('--workers', type=int, default=None, help="Password hashing processes (default: CPU count).")
+        parser.add_argument('--dry-run', action='store_true', help="Validate the file without creating users.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f"Cannot open {path}: {exc}")
+
+        with stream:
+            summary = import_users(
+                read_user_rows(stream, fmt),
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+                workers=options['workers'],
+            )
+
+        for error in summary['errors']:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        verb = "Would create" if summary['dry_run'] else "Created"
+        self.stdout.write(f"{verb} {summary['created']} user(s), skipped {summary['skipped']}.")
@@ -2,6 +2,15 @@ from user.serializers import UserRegistrationSerializer, UserLoginSerializer
 from user.models import User
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.exceptions import AuthenticationFailed
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+import csv
+import json
 
 def register_user(data):
     serializer = UserRegistrationSerializer(data=data)
@@ -37,3 +46,152 @@ def login_user(data):
         'refresh': str(refresh),
         'access': str(refresh.access_token)
     }
+
+REQUIRED_IMPORT_FIELDS = ('username', 'email', 'password')
+OPTIONAL_IMPORT_FIELDS = ('first_name', 'last_name')
+MAX_REPORTED_ERRORS = 100
+
+def read_user_rows(stream, fmt):
+    """
+    Lazily yields `(line_number, row)` pairs from a CSV (with a header row)
+    or NDJSON text stream, one row at a time.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+def _init_hash_worker():
+    # Worker processes need configured settings for the password hashers
+    import django
+    django.setup()
+
+def _validate_user_row(row):
+    # Returns an error message for a malformed row, or None.
+    # Normalizes the username and email in place, as `create_user` would.
+    if not isinstance(row, dict):
+        return "Row is not a valid JSON object."
+    missing = [field for field in REQUIRED_IMPORT_FIELDS if not row.get(field)]
+    if missing:
+        return f"Missing required field(s): {', '.join(missing)}."
+    if any(not isinstance(row.get(field) or '', str) for field in REQUIRED_IMPORT_FIELDS + OPTIONAL_IMPORT_FIELDS):
+        return "Fields must be strings."
+    row['username'] = User.normalize_username(row['username'])
+    row['email'] = User.objects.normalize_email(row['email'])
+    for field in ('username', 'email') + OPTIONAL_IMPORT_FIELDS:
+        max_length = User._meta.get_field(field).max_length
+        if len(row.get(field) or '') > max_length:
+            return f"{field} is longer than {max_length} characters."
+    try:
+        validate_email(row['email'])
+        User.username_validator(row['username'])
+    except ValidationError as exc:
+        return ' '.join(exc.messages)
+    return None
+
+def _insert_users(users, reject):
+    # Inserts the batch in one statement. If a concurrent signup or import
+    # took a username or email since the duplicate check, retries row by
+    # row and rejects only the conflicting users. Returns the number created.
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create([user for _, user in users])
+        return len(users)
+    except IntegrityError:
+        pass
+    created = 0
+    for line_number, user in users:
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+            created += 1
+        except IntegrityError:
+            reject(line_number, "A user with this username or email already exists.")
+    return created
+
+def import_users(rows, batch_size=1000, dry_run=False, workers=None):
+    """
+    Bulk-creates users from an iterable of `(line_number, row)` pairs.
+
+    - Consumes the rows in batches, so memory stays flat for any input size
+    - Validates each row against the model's field lengths, normalizes
+      usernames and emails like `create_user`, and skips duplicates, both
+      within the batch and against existing users (one query per batch)
+    - Hashes the batch's passwords on a process pool (`workers=1` hashes in-process)
+    - Inserts each batch with a single `bulk_create`; users taken concurrently
+      since the duplicate check are skipped, not fatal
+    - With `dry_run`, validates everything and writes nothing; `created` is then
+      the number of users that would be created (duplicates spanning batches
+      are only caught on the real run)
+    - Returns a summary with the created/skipped counts and the first errors
+    """
+    summary = {'dry_run': dry_run, 'created': 0, 'skipped': 0, 'errors': []}
+
+    def reject(line_number, message):
+        summary['skipped'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line_number, 'error': message})
+
+    pool = None
+    if workers != 1 and not dry_run:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker)
+
+    rows = iter(rows)
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            # Cheap per-row checks first, then one duplicate query for the whole batch
+            valid, seen = [], set()
+            for line_number, row in batch:
+                error = _validate_user_row(row)
+                if error is None and (row['username'] in seen or row['email'] in seen):
+                    error = "Duplicate username or email within the file."
+                if error:
+                    reject(line_number, error)
+                    continue
+                seen.update((row['username'], row['email']))
+                valid.append((line_number, row))
+
+            existing = set()
+            for username, email in User.objects.filter(
+                Q(username__in=[row['username'] for _, row in valid]) | Q(email__in=[row['email'] for _, row in valid])
+            ).values_list('username', 'email'):
+                existing.update((username, email))
+
+            new_rows = []
+            for line_number, row in valid:
+                if row['username'] in existing or row['email'] in existing:
+                    reject(line_number, "A user with this username or email already exists.")
+                else:
+                    new_rows.append((line_number, row))
+
+            if new_rows and not dry_run:
+                passwords = [row['password'] for _, row in new_rows]
+                hashed = pool.map(make_password, passwords, chunksize=64) if pool else map(make_password, passwords)
+                summary['created'] += _insert_users([
+                    (line_number, User(
+                        username=row['username'],
+                        email=row['email'],
+                        first_name=row.get('first_name') or '',
+                        last_name=row.get('last_name') or '',
+                        password=password,
+                    ))
+                    for (line_number, row), password in zip(new_rows, hashed)
+                ], reject)
+            else:
+                summary['created'] += len(new_rows)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return summary
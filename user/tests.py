@@ -1,3 +1,59 @@
-from django.test import TestCase
+import io
+from django.test import TestCase, override_settings
+from .models import User
+from .services import _insert_users, import_users
 
-# Create your tests here.
+
+class ImportUsersTests(TestCase):
+    def rows(self, *rows):
+        return list(enumerate(rows, start=2))
+
+    def test_rows_are_normalized_and_length_checked(self):
+        summary = import_users(self.rows(
+            {'username': 'alice', 'email': 'Alice@EXAMPLE.COM', 'password': 'pw'},
+            {'username': 'b' * 151, 'email': 'bob@example.com', 'password': 'pw'},
+            {'username': 'carol', 'email': 'c' * 250 + '@example.com', 'password': 'pw'},
+        ), workers=1)
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual([error['line'] for error in summary['errors']], [3, 4])
+        self.assertTrue(User.objects.filter(email='Alice@example.com').exists())
+
+    def test_normalized_email_matches_existing_user(self):
+        User.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        summary = import_users(self.rows({'username': 'alice2', 'email': 'alice@EXAMPLE.com', 'password': 'pw'}), workers=1)
+        self.assertEqual((summary['created'], summary['skipped']), (0, 1))
+
+    def test_users_taken_concurrently_are_skipped(self):
+        # A signup that lands between the duplicate check and the insert
+        User.objects.create_user(username='taken', email='taken@example.com', password='pw')
+        rejected = []
+        created = _insert_users([
+            (2, User(username='taken', email='other@example.com', password='x')),
+            (3, User(username='free', email='free@example.com', password='x')),
+        ], lambda line_number, message: rejected.append(line_number))
+        self.assertEqual(created, 1)
+        self.assertEqual(rejected, [2])
+        self.assertTrue(User.objects.filter(username='free').exists())
+
+
+@override_settings(USER_IMPORT_MAX_ROWS=2)
+class ImportUsersEndpointTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        self.client.force_login(admin)
+
+    def upload(self, count):
+        lines = ['username,email,password'] + [f'user{n},user{n}@example.com,pw' for n in range(count)]
+        upload = io.BytesIO('\n'.join(lines).encode())
+        upload.name = 'users.csv'
+        return self.client.post('/api/user/import/', {'file': upload}, secure=True)
+
+    def test_imports_small_files(self):
+        response = self.upload(2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+
+    def test_rejects_files_over_the_row_limit(self):
+        response = self.upload(3)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(username__startswith='user').exists())
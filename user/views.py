@@ -1,11 +1,16 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.exceptions import ValidationError
 from rest_framework.exceptions import PermissionDenied, NotFound
 from .models import User
 from .serializers import UserSerializer, UserLoginSerializer, UserRegistrationSerializer
-from .services import login_user, register_user
+from .services import login_user, register_user, import_users, read_user_rows
+from polls.services import vote_history, clamp_page_size
+from django.conf import settings
+from itertools import islice
+import io
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -96,4 +101,45 @@ class UserViewSet(viewsets.ModelViewSet):
         Returns JWT access and refresh tokens upon successful login.
         """
         data = login_user(request.data)
-        return Response(data, status=200)
\ No newline at end of file
+        return Response(data, status=200)
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminUser])
+    def bulk_import(self, request):
+        """
+        Admin-only bulk user provisioning.
+        Accepts a multipart `file` (CSV with a header row, or NDJSON) and
+        runs it through the same importer as the `import_users` command.
+        Passwords are hashed in this request, so files are capped at
+        `USER_IMPORT_MAX_ROWS` rows; larger ones go through the command.
+        Pass `?dry_run=true` to validate without creating anyone.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': "Upload a CSV or NDJSON file."})
+
+        fmt = request.query_params.get('format_type') or ('csv' if upload.name.endswith('.csv') else 'ndjson')
+        limit = settings.USER_IMPORT_MAX_ROWS
+        rows = list(islice(read_user_rows(io.TextIOWrapper(upload.file, encoding='utf-8', newline=''), fmt), limit + 1))
+        if len(rows) > limit:
+            raise ValidationError({'file': f"Files over {limit} rows must be imported with `manage.py import_users`."})
+
+        summary = import_users(
+            rows,
+            dry_run=request.query_params.get('dry_run', '').lower() in ('true', '1'),
+            workers=1,
+        )
+        return Response(summary, status=200 if summary['dry_run'] else 201)
+
+    @action(detail=False, methods=['get'], url_path='me/votes', permission_classes=[IsAuthenticated])
+    def my_votes(self, request):
+        """
+        The caller's voting history, newest first: one row per vote or ranked
+        ballot, with its poll and question. Pages with `?cursor=` (the `next`
+        value of the previous page) and `?page_size=` (up to 100).
+        """
+        rows, next_cursor = vote_history(
+            request.user,
+            cursor=request.query_params.get('cursor'),
+            page_size=clamp_page_size(request.query_params.get('page_size')),
+        )
+        return Response({'results': rows, 'next': next_cursor}, status=200)